@@ -1,9 +1,11 @@
 from beliefbase import BeliefBase
-import copy
 
 class TestAGMPostulates:
-    
-    
+
+    def __init__(self, engine='resolution', mode='partial_meet'):
+        self.engine = engine
+        self.mode = mode  # contraction operator, 'partial_meet' or 'kernel', or the revision mode 'entrenchment'
+
     # --- Contraction Postulates ---
     def test_postulate_contraction_succes(self):
         """
@@ -14,9 +16,9 @@ class TestAGMPostulates:
             ("p", 'high'),
             ("p >> q", 'mid'), 
             ("q", 'low')
-        ]) 
+        ], engine=self.engine) 
         phi = "q"
-        base.contraction(phi)
+        base.contraction(phi, self.mode)
 
         entails_q = base.resolution(base.belief_base, phi)
         assert entails_q is False , "After contraction, q should not be entailed"
@@ -32,10 +34,10 @@ class TestAGMPostulates:
             ("p", 'high'),
             ("p >> q", 'mid'), 
             ("q", 'low')
-        ])
+        ], engine=self.engine)
         phi = "q"
         original_beliefs = base.belief_base.copy()
-        base.contraction(phi)
+        base.contraction(phi, self.mode)
 
         issubset = base.belief_base.issubset(original_beliefs)
         assert issubset is True , "Contracted set is not a subset of original"
@@ -51,10 +53,10 @@ class TestAGMPostulates:
             ("p", 'high'),
             ("p >> q", 'mid'), 
             ("q", 'low')
-        ])
+        ], engine=self.engine)
         original_beliefs = base.belief_base.copy()
         phi = "r"
-        base.contraction(phi)
+        base.contraction(phi, self.mode)
 
         assert base.belief_base == original_beliefs , "Base changed when contracting non-entailed belief"
 
@@ -67,13 +69,13 @@ class TestAGMPostulates:
         the outcomes of contracting with equivalent sentences are the same
         """
         initial = [("p", 'high'), ("p >> q", 'mid'), ("q", 'low')]
-        base1 = BeliefBase(initial)
-        base2 = BeliefBase(initial)
+        base1 = BeliefBase(initial, engine=self.engine)
+        base2 = BeliefBase(initial, engine=self.engine)
 
         phi, psi = "q | r", "r | q" 
 
-        base1.contraction(phi)
-        base2.contraction(psi)
+        base1.contraction(phi, self.mode)
+        base2.contraction(psi, self.mode)
 
         # Check if the contracted bases are logically equivalent
         assert self.logically_equivalent(base1, base2), \
@@ -91,9 +93,9 @@ class TestAGMPostulates:
         base = BeliefBase(initial_beliefs=[
             ("p", 'high'),
             ("p >> q", 'mid')
-        ])
+        ], engine=self.engine)
         phi = "q"
-        base.revision(phi)
+        base.revision(phi, mode=self.mode)
 
         entails_q = base.resolution(base.belief_base, phi)
         assert entails_q, "After revision, q should be entailed"
@@ -108,13 +110,13 @@ class TestAGMPostulates:
         base = BeliefBase(initial_beliefs=[
             ("p", 'high'),
             ("p >> q", 'mid')
-        ])
+        ], engine=self.engine)
         phi = "q"
 
-        expanded = copy.deepcopy(base)
+        expanded = base.fork()
         expanded.expansion(phi)
 
-        base.revision(phi)
+        base.revision(phi, mode=self.mode)
 
         assert base.belief_base.issubset(expanded.belief_base) is True, "Revision should be a subset of the expansion"
 
@@ -130,15 +132,15 @@ class TestAGMPostulates:
             ("p", 'high'),
             ("p >> q", 'mid')
         ]
-        base = BeliefBase(initial_beliefs)
+        base = BeliefBase(initial_beliefs, engine=self.engine)
         phi = "q"
         
         # Perform expansion (B + ϕ)
-        expanded = BeliefBase(initial_beliefs)
+        expanded = BeliefBase(initial_beliefs, engine=self.engine)
         expanded.expansion(phi) 
         
         # Perform revision (B * ϕ)
-        base.revision(phi)
+        base.revision(phi, mode=self.mode)
         
         # Check if B * ϕ equals B + ϕ
         assert base.belief_base == expanded.belief_base, \
@@ -152,17 +154,17 @@ class TestAGMPostulates:
         Consistency: B * ϕ is consistent if ϕ is consistent
         """
         # Case 1: ϕ is consistent with B
-        base = BeliefBase(initial_beliefs=[("p", 'high')])
+        base = BeliefBase(initial_beliefs=[("p", 'high')], engine=self.engine)
         phi = "q"
-        base.revision(phi)
+        base.revision(phi, mode=self.mode)
         
         assert not base.resolution(base.belief_base, "False"), \
             "B * ϕ must be consistent when ϕ is consistent"
         
         # Case 2: ϕ contradicts B (tests conflict resolution)
-        conflict_base = BeliefBase(initial_beliefs=[("p", 'high'), ("¬p", 'mid')])
+        conflict_base = BeliefBase(initial_beliefs=[("p", 'high'), ("~p", 'mid')], engine=self.engine)
         conflict_phi = "p"  
-        conflict_base.revision(conflict_phi)
+        conflict_base.revision(conflict_phi, mode=self.mode)
       
         assert not conflict_base.resolution(conflict_base.belief_base, "False"), \
             "B * ϕ must resolve conflicts to maintain consistency"
@@ -177,16 +179,16 @@ class TestAGMPostulates:
             ("p", 'high'),
             ("p >> q", 'mid')
         ]
-        base1 = BeliefBase(initial)
-        base2 = BeliefBase(initial)
+        base1 = BeliefBase(initial, engine=self.engine)
+        base2 = BeliefBase(initial, engine=self.engine)
 
         phi = "q | r" 
         psi = "r | q" 
 
         assert set(phi.split()) == set(psi.split())
 
-        base1.revision(phi)
-        base2.revision(psi)
+        base1.revision(phi, mode=self.mode)
+        base2.revision(psi, mode=self.mode)
         
         assert self.logically_equivalent(base1, base2), \
             f"Extensionality violated: B * {phi} ≠ B * {psi}"
@@ -211,11 +213,13 @@ class TestAGMPostulates:
 
 
     def run_all_postulate_test(self):
-        print("\n ---- AGM postulates for contraction ----\n")
-        self.test_postulate_contraction_succes()
-        self.test_postulate_contraction_inclusion()
-        self.test_postulate_contraction_vacuity()
-        self.test_postulate_contraction_extensionality()
+        # 'entrenchment' is a revision mode only, there is no such contraction
+        if self.mode != 'entrenchment':
+            print("\n ---- AGM postulates for contraction ----\n")
+            self.test_postulate_contraction_succes()
+            self.test_postulate_contraction_inclusion()
+            self.test_postulate_contraction_vacuity()
+            self.test_postulate_contraction_extensionality()
 
         print("\n ---- AGM postulates for revision ----\n")
         self.test_postulate_revision_succes()
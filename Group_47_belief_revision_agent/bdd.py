@@ -0,0 +1,220 @@
+"""
+Knowledge compilation of a belief base into a reduced ordered binary decision diagram.
+
+Nodes are integers: 0 and 1 are the terminals False and True, every other node has a
+level (its position in the variable order), a low child (variable false) and a high child
+(variable true). A unique table hash-conses the nodes, so equal functions are the same
+node, and conjunctions are memoized in an operation cache.
+
+Variables get a level when they are first seen, so the diagram can be extended with new
+clauses at any time (expansion only conjoins the clauses of the new belief). Whether the
+compiled base entails a clause C is one traversal of the diagram: the base and ~C are
+consistent iff a path to True agrees with the assignment falsifying C.
+
+Compilation and traversals take an optional budget (see budget.py), checked every
+CHECK_INTERVAL steps: max_clauses bounds the nodes and max_memory their estimated bytes.
+A compilation that runs out of budget keeps the clauses it has conjoined and continues
+from there the next time.
+"""
+import threading
+
+FALSE, TRUE = 0, 1
+
+# steps between two budget checks
+CHECK_INTERVAL = 1024
+# estimated bytes of a node (its entries in the lists and the unique table) and of an
+# entry of the operation cache, for the max_memory budget
+NODE_SIZE = 150
+CACHE_ENTRY_SIZE = 120
+# the operation cache is cleared between two conjunctions once it has this many entries
+MAX_CACHE_ENTRIES = 1 << 20
+
+
+class BDD:
+    """Node manager: unique table, operation cache and variable order"""
+    def __init__(self):
+        terminal = float('inf')
+        self.level = [terminal, terminal]   # node -> level
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique = {}                    # (level, low, high) -> node
+        self.and_cache = {}                 # (u, v) with u <= v -> u & v
+        self.levels = {}                    # variable -> level
+        # held while nodes are added: the forks of a belief base share the node manager
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.level)
+
+    def check(self, budget):
+        budget.check(len(self.level), len(self.level) * NODE_SIZE + len(self.and_cache) * CACHE_ENTRY_SIZE)
+
+    def level_of(self, var):
+        level = self.levels.get(var)
+        if level is None:
+            level = self.levels[var] = len(self.levels)
+        return level
+
+    def node(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = self.unique[key] = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+        return node
+
+    def clause(self, clause):
+        """Node of a disjunction of literals, built bottom-up as a chain"""
+        literals = sorted(clause, key=lambda lit: self.level_of(abs(lit)), reverse=True)
+        node = FALSE
+        for lit in literals:
+            if -lit in clause:
+                return TRUE
+            if lit > 0:
+                node = self.node(self.levels[lit], node, TRUE)
+            else:
+                node = self.node(self.levels[-lit], TRUE, node)
+        return node
+
+    def conjoin(self, u, v, budget=None):
+        """
+        Node of u & v, with an explicit stack so deep diagrams do not recurse.
+        budget: optional limits, BudgetExceeded leaves the diagram and the cache valid.
+        """
+        if len(self.and_cache) > MAX_CACHE_ENTRIES:
+            self.and_cache.clear()
+        cache = self.and_cache
+        level, low, high = self.level, self.low, self.high
+        root = (u, v) if u <= v else (v, u)
+        stack = [root]
+        steps = 0
+        while stack:
+            steps += 1
+            if budget is not None and steps % CHECK_INTERVAL == 0:
+                self.check(budget)
+            key = stack[-1]
+            if key in cache:
+                stack.pop()
+                continue
+            a, b = key
+            if a == FALSE or a == b:
+                cache[key] = a
+                stack.pop()
+                continue
+            if a == TRUE:
+                cache[key] = b
+                stack.pop()
+                continue
+
+            top = min(level[a], level[b])
+            a0, a1 = (low[a], high[a]) if level[a] == top else (a, a)
+            b0, b1 = (low[b], high[b]) if level[b] == top else (b, b)
+            k0 = (a0, b0) if a0 <= b0 else (b0, a0)
+            k1 = (a1, b1) if a1 <= b1 else (b1, a1)
+            r0, r1 = cache.get(k0), cache.get(k1)
+            if r0 is None or r1 is None:
+                if r0 is None:
+                    stack.append(k0)
+                if r1 is None:
+                    stack.append(k1)
+                continue
+            stack.pop()
+            cache[key] = self.node(top, r0, r1)
+        return cache[root]
+
+    def consistent_with(self, u, assignment, budget=None):
+        """True if some path from u to True agrees with assignment (level -> bool)"""
+        level, low, high = self.level, self.low, self.high
+        stack = [u]
+        seen = set()
+        steps = 0
+        while stack:
+            steps += 1
+            if budget is not None and steps % CHECK_INTERVAL == 0:
+                self.check(budget)
+            node = stack.pop()
+            if node == TRUE:
+                return True
+            if node == FALSE or node in seen:
+                continue
+            seen.add(node)
+            value = assignment.get(level[node])
+            if value is None:
+                stack.append(low[node])
+                stack.append(high[node])
+            else:
+                stack.append(high[node] if value else low[node])
+        return False
+
+    def size(self, u):
+        """Number of nodes reachable from u, terminals included"""
+        seen = set()
+        stack = [u]
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                if node > TRUE:
+                    stack.append(self.low[node])
+                    stack.append(self.high[node])
+        return len(seen)
+
+
+class CompiledBase:
+    """
+    The conjunction of the clauses of a belief base as one BDD node. Clauses are queued by
+    add() and conjoined by build(), which every query calls first.
+    Nodes are never changed once created, so copy() shares the node manager: each copy
+    only has its own root and queue.
+    """
+    def __init__(self, clauses=()):
+        self.bdd = BDD()
+        self.root = TRUE
+        self.pending = []
+        self.add(clauses)
+
+    def copy(self):
+        other = object.__new__(CompiledBase)
+        other.bdd = self.bdd
+        other.root = self.root
+        other.pending = list(self.pending)
+        return other
+
+    def add(self, clauses):
+        self.pending.extend(clauses)
+
+    def build(self, budget=None):
+        """Conjoins the queued clauses; after BudgetExceeded, the ones done so far are kept"""
+        if not self.pending:
+            return
+        with self.bdd.lock:
+            while self.pending:
+                clause = self.pending[-1]
+                self.root = self.bdd.conjoin(self.root, self.bdd.clause(clause), budget)
+                self.pending.pop()
+
+    def is_consistent(self, budget=None):
+        self.build(budget)
+        return self.root != FALSE
+
+    def entails_clause(self, clause, budget=None):
+        """base |= clause iff base & ~clause has no model"""
+        if any(-lit in clause for lit in clause):
+            return True
+        self.build(budget)
+        levels = self.bdd.levels
+        # variables outside the order do not occur in the base and are left free
+        falsified = {levels[abs(lit)]: lit < 0 for lit in clause if abs(lit) in levels}
+        return not self.bdd.consistent_with(self.root, falsified, budget)
+
+    def entails(self, clauses, budget=None):
+        """base |= the conjunction of clauses"""
+        return all(self.entails_clause(clause, budget) for clause in clauses)
+
+    def size(self):
+        self.build()
+        return self.bdd.size(self.root)
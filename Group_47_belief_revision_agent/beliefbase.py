@@ -1,22 +1,87 @@
-from sympy.logic.boolalg import to_cnf, And, Or
-from sympy import sympify
+import time
+import weakref
+from contextlib import contextmanager
 from itertools import combinations
+from clauses import ClauseDatabase, compile_formula, compile_negation, negation, resolve, symbols, variables
+from cdcl import Solver
+from bdd import CompiledBase
+from engines import get_engine, open_session, has_session, decide, decide_with
+from budget import BudgetExceeded, UNKNOWN, ON_UNKNOWN
+from remainders import compute_kernels
+from parallel import SubsetChecker
+from entailment_cache import EntailmentCache
+from stats import ProverStats
+from store import BeliefStore, Version, priority_level
+from loader import read_beliefs, chunks
+from snapshot import save_snapshot, load_snapshot
 
 class BeliefBase:
     """Representation of the belief base"""
-    def __init__(self, initial_beliefs=None):
+    def __init__(self, initial_beliefs=None, engine='resolution', remainders='kernel', workers=None,
+                 cache_size=4096, encoding='cnf', compiled=False, preprocess=None, budget=None,
+                 on_unknown='raise'):
         """
         Initialize the belief base with optional initial beliefs.
         
         Args:
             initial_beliefs (list): A list of beliefs, where each belief can be:
-                - A string/sympify-compatible formula, assigned default priority 'low'.
-                - A tuple (belief, priority), where priority is 'low', 'mid', or 'high'.
+                - A formula string (see formulas.py) or sympy expression, assigned default priority 'low'.
+                - A tuple (belief, priority), where priority is 'low', 'mid', 'high'
+                  or a numeric level such as 2.5 (low = 1, mid = 2, high = 3, see store.py).
+            engine (str): The entailment engine, 'resolution' or 'cdcl' (see engines.py).
+                An engine instance with an is_unsatisfiable(clauses) method is accepted too.
+            remainders (str): How the remainder set is computed during contraction:
+                - 'kernel': from the minimal hitting sets of the ϕ-kernels (see remainders.py).
+                - 'subsets': by checking every subset of the belief base, largest first.
+            workers (int): Number of processes checking the subsets of one size in parallel
+                with remainders='subsets'. None or 1 checks them in this process. The kernel
+                computation is sequential, so workers > 1 requires remainders='subsets'.
+                The pool is started by the first contraction and kept until close().
+            cache_size (int): Number of entailment results remembered between changes of the
+                belief base (see entailment_cache.py), 0 disables the cache.
+            encoding (str): How formulas are converted to clauses (see formulas.py):
+                - 'cnf': equivalent CNF by distribution, can be exponential in the formula size.
+                - 'tseitin': definitional CNF with hidden auxiliary variables, linear in size.
+            compiled (bool): Answer entailment queries on the whole belief base from a BDD of
+                the base (see bdd.py) instead of the engine. The BDD is built on the first
+                query, extended on expansion and rebuilt after a contraction. The compilation
+                is bounded by the budget too, a query that runs out of it is answered UNKNOWN.
+            preprocess (bool): Simplify the clauses of every entailment check before the engine
+                sees them (see preprocess.py); the simplification alone decides most checks.
+                None (default) uses the default of the engine: on for resolution, off for cdcl.
+            budget (Budget): Default resource budget of every entailment, contraction and
+                revision call (see budget.py); the calls also accept their own. None: unlimited.
+            on_unknown (str): What a contraction or revision does with a check that ran out of budget:
+                - 'raise': BudgetExceeded is raised and the belief base is left unchanged.
+                - 'entailed': the subset is taken to entail ϕ, so more beliefs may be given up.
+                - 'not_entailed': the subset is taken not to entail ϕ, so more beliefs are kept.
         """
-        self.belief_base = set()
-        self.low_prio = set()
-        self.mid_prio = set()
-        self.high_prio = set()
+        if remainders not in ('kernel', 'subsets'):
+            raise ValueError(f"Unknown remainder computation '{remainders}', choose 'kernel' or 'subsets'")
+        if on_unknown not in ON_UNKNOWN:
+            raise ValueError(f"Unknown on_unknown policy '{on_unknown}', choose from: {', '.join(ON_UNKNOWN)}")
+        if workers and workers > 1 and remainders != 'subsets':
+            raise ValueError(f"workers={workers} needs remainders='subsets', the '{remainders}' computation is sequential")
+        self.engine = get_engine(engine, preprocess)
+        self.remainders = remainders
+        self.workers = workers
+        self._checker = None    # SubsetChecker of the workers, started on first use
+        self.clause_db = ClauseDatabase(encoding)
+        self.encoding = encoding
+        self.entailment_cache = EntailmentCache(cache_size) if cache_size else None
+        self.stats = None
+        self.store = BeliefStore()
+        self._consistency = {}  # connected component of the base -> is it consistent
+        self._journal = None    # undo entries while a version of the base is alive
+        self._journal_start = 0 # position of the first journal entry, older ones are dropped
+        self._journal_last = None  # the last dropped entry
+        self._versions = weakref.WeakSet()  # live versions returned by snapshot()
+        self._shared = False    # store and clause database shared with a fork
+        self.compiled = compiled
+        self._bdd = None        # CompiledBase of the current beliefs, built on demand
+        self.budget = budget
+        self.on_unknown = on_unknown
+        self._limits = None     # started budget of the running call (see _bounded)
 
         if initial_beliefs:
             for belief in initial_beliefs:
@@ -26,135 +91,578 @@ class BeliefBase:
                 else:
                     self.add_with_priority(belief, 'low')
 
+    # Views of the belief store, kept for compatibility: read-only sets of formulas
+
+    @property
+    def belief_base(self):
+        return self.store.frozen()
+
+    @belief_base.setter
+    def belief_base(self, new_beliefs):
+        self._update_belief_base(new_beliefs)
+
+    @property
+    def low_prio(self):
+        return self.store.bands()[0]
+
+    @property
+    def mid_prio(self):
+        return self.store.bands()[1]
+
+    @property
+    def high_prio(self):
+        return self.store.bands()[2]
+
     def clear(self):
-        self.belief_base.clear()
-        self.low_prio.clear()
-        self.mid_prio.clear()
-        self.high_prio.clear()
-
-    def add_with_priority(self, belief, priority='high'):
-        """Add a belief with specified priority"""
-        if priority == 'low':
-            self.low_prio.add(belief)
-        elif priority == 'mid':
-            self.mid_prio.add(belief)
-        elif priority == 'high':
-            self.high_prio.add(belief)
+        if self._journaling() or self._shared:
+            # removing every belief keeps the change undoable and leaves a fork untouched
+            self._update_belief_base(())
+            return
+        self.clause_db.clear()
+        self.store.clear()
+        self._bdd = None
+        self._invalidate()
+
+    def add_with_priority(self, belief, priority='high', encoding=None):
+        """
+        Add a belief with specified priority ('low', 'mid', 'high' or a numeric level).
+        Adding a belief that is already in the base changes its priority.
+        encoding overrides the encoding of the base for this belief, e.g. 'tseitin' for a
+        single formula whose distributed CNF would be too large.
+        """
+        clauses = None
+        if belief not in self.clause_db:
+            if self.stats is None:
+                clauses = compile_formula(belief, encoding or self.encoding)
+            else:
+                with self.stats.phase('cnf'):
+                    clauses = compile_formula(belief, encoding or self.encoding)
+        self._add_compiled(belief, priority_level(priority), clauses)
+        self._invalidate()
+
+    def _add_compiled(self, formula, level, clauses):
+        """Adds a belief with its clauses (None if it is already in the clause database)"""
+        self._before_write()
+        is_new = formula not in self.store
+        if self._journaling():
+            self._journal.append(('add', formula, None if is_new else self.store.level(formula)))
+        self.store.add(formula, level)
+        self.clause_db.add(formula, clauses)
+        if is_new and self._bdd is not None:
+            self._bdd.add(self.clause_db.by_belief[formula])
+
+    def add_many(self, beliefs, chunk_size=1000):
+        """
+        Adds (formula, priority) pairs, e.g. from loader.read_beliefs, with a single
+        invalidation of the cached results at the end. The pairs are consumed lazily in
+        chunks and all formulas are clausified before anything is committed, so an invalid
+        formula leaves the belief base unchanged. Returns the number of beliefs read.
+        """
+        compiled = []
+        for chunk in chunks(beliefs, chunk_size):
+            if self.stats is None:
+                compiled.extend(self._compile_chunk(chunk))
+            else:
+                with self.stats.phase('cnf'):
+                    compiled.extend(self._compile_chunk(chunk))
+
+        for formula, level, clauses in compiled:
+            self._add_compiled(formula, level, clauses)
+        if compiled:
+            self._invalidate()
+        return len(compiled)
+
+    def _compile_chunk(self, chunk):
+        compiled = []
+        for formula, priority in chunk:
+            clauses = None if formula in self.clause_db.by_belief else compile_formula(formula, self.encoding)
+            compiled.append((formula, priority_level(priority), clauses))
+        return compiled
+
+    def load_beliefs(self, source, format=None, chunk_size=1000):
+        """
+        Adds the beliefs of a file, '-' for stdin, or an open text file, one per line as
+        "formula [priority]" or as JSON lines (see loader.py). Returns the number of beliefs read.
+        """
+        return self.add_many(read_beliefs(source, format), chunk_size)
+
+    def save(self, path):
+        """Writes the compiled belief base to a binary snapshot file (see snapshot.py)"""
+        save_snapshot(self, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """
+        New belief base from a snapshot written by save, the keyword arguments are those of
+        __init__. No formula is parsed, so loading does not depend on the CNF conversion.
+        """
+        belief_base = cls(**kwargs)
+        load_snapshot(belief_base, path)
+        return belief_base
+
+    def close(self):
+        """Shuts down the worker processes, if any; a later contraction starts them again"""
+        if self._checker is not None:
+            self._checker.close()
+            self._checker = None
+
+    def snapshot(self):
+        """
+        Returns the current version of the belief base, in O(1). While a version is alive,
+        every change is journaled so that restore() can undo it.
+        """
+        if self._journal is None:
+            self._journal = []
+        last = self._journal[-1] if self._journal else self._journal_last
+        version = Version(self, self._journal_start + len(self._journal), last)
+        self._versions.add(version)
+        return version
+
+    def release(self, version):
+        """
+        Gives up a version returned by snapshot(), it cannot be restored anymore. The journal
+        entries that no live version needs are dropped; without live versions the base
+        stops journaling. Versions that are no longer referenced are released by themselves.
+        """
+        self._versions.discard(version)
+        self._trim_journal()
+
+    def _journaling(self):
+        """Whether the changes are journaled: while a version of the base is alive"""
+        if self._journal is not None and not self._versions:
+            self._trim_journal()
+        return self._journal is not None
+
+    def _trim_journal(self):
+        if self._journal is None:
+            return
+        end = self._journal_start + len(self._journal)
+        oldest = min((version.position for version in self._versions), default=end)
+        dropped = min(oldest, end) - self._journal_start
+        if dropped > 0:
+            self._journal_last = self._journal[dropped - 1]
+            del self._journal[:dropped]
+            self._journal_start += dropped
+        if not self._versions:
+            self._journal = None
+
+    def restore(self, version):
+        """
+        Goes back to a version returned by snapshot(), undoing the changes made since, so
+        the cost is proportional to the number of changed beliefs. The compiled clauses are
+        kept, nothing is parsed again.
+        """
+        journal = self._journal
+        if version.owner is not self or version not in self._versions:
+            raise ValueError(f"{version} is not a live version of this belief base")
+        index = version.position - self._journal_start
+        if index > len(journal) or (journal[index - 1] if index else self._journal_last) is not version.last:
+            raise ValueError(f"{version} is not a version of the current history of this belief base")
+        if index == len(journal):
+            return
+
+        self._before_write()
+        self._bdd = None
+        while len(journal) > index:
+            entry = journal.pop()
+            if entry[0] == 'add':
+                _, formula, old_level = entry
+                if old_level is None:
+                    self.store.discard(formula)
+                    self.clause_db.retract(formula)
+                else:
+                    self.store.add(formula, old_level)
+            else:
+                _, formula, level, belief_id, clauses = entry
+                self.store.add(formula, level, belief_id)
+                self.clause_db.add(formula, clauses)
+        self._invalidate()
+
+    def fork(self):
+        """
+        Independent belief base with the same beliefs and settings, in O(1): the belief store
+        and clause database are shared until one of the two bases changes, which then copies
+        them (the compiled clauses themselves are never copied). In compiled mode the fork
+        starts from the BDD of the base. The fork has no stats, an empty entailment cache
+        and no versions of its own.
+        """
+        other = object.__new__(type(self))
+        other.__dict__.update(self.__dict__)
+        if self.entailment_cache is not None:
+            other.entailment_cache = EntailmentCache(self.entailment_cache.maxsize)
+        other.stats = None
+        other._consistency = dict(self._consistency)
+        other._journal = None
+        other._journal_start = 0
+        other._journal_last = None
+        other._versions = weakref.WeakSet()
+        other._bdd = None if self._bdd is None else self._bdd.copy()
+        other._limits = None
+        other._checker = None
+        self._shared = other._shared = True
+        return other
+
+    def compiled_base(self, budget=None):
+        """
+        The BDD of the current belief base (see bdd.py), compiled on first use.
+        budget: optional limits of the compilation; after BudgetExceeded, the next call
+        continues the compilation where it stopped.
+        """
+        if self._bdd is None:
+            self._bdd = CompiledBase(self.clause_db.clauses())
+        if self.stats is None:
+            self._bdd.build(budget)
         else:
-            self.low_prio.add(belief)
-        self.belief_base = self.concatenate_priorities()
+            with self.stats.phase('compilation'):
+                self._bdd.build(budget)
+        return self._bdd
+
+    def _before_write(self):
+        """Copy on write: takes private copies of the state shared with a fork"""
+        if self._shared:
+            self.store = self.store.copy()
+            self.clause_db = self.clause_db.copy()
+            self._shared = False
+
+    def enable_stats(self, callback=None):
+        """
+        Start collecting prover statistics (see stats.py) and return the stats object.
+        callback(event, data) is called after every entailment check and contraction.
+        """
+        if self.stats is None:
+            self.stats = ProverStats(callback)
+        elif callback is not None:
+            self.stats.add_callback(callback)
+        return self.stats
+
+    def disable_stats(self):
+        self.stats = None
+
+    def _start(self, budget):
+        """Limits of a call: those of the enclosing call, else budget (default self.budget) started now"""
+        if self._limits is not None:
+            return self._limits
+        budget = budget if budget is not None else self.budget
+        return budget.start() if budget is not None else None
+
+    @contextmanager
+    def _bounded(self, budget):
+        """Runs the with block under the limits of _start, the checks it makes share them"""
+        outer = self._limits
+        self._limits = self._start(budget)
+        try:
+            yield self._limits
+        finally:
+            self._limits = outer
+
+    def _expired(self):
+        """
+        None while the deadline of the running call has not passed, afterwards the answer
+        of every further check by the on_unknown policy (BudgetExceeded with 'raise')
+        """
+        if self._limits is not None:
+            try:
+                self._limits.check()
+            except BudgetExceeded as e:
+                return self._unknown(e)
+        return None
+
+    def _unknown(self, error):
+        """Answer of a check that ran out of budget during a contraction, by the on_unknown policy"""
+        if self.on_unknown == 'raise':
+            raise error
+        return self.on_unknown == 'entailed'
+
+    def _invalidate(self):
+        """Forget the cached entailment results, called whenever the belief base changes"""
+        if self.entailment_cache is not None:
+            self.entailment_cache.clear()
+        self._consistency.clear()
+
+    def _belief_id(self, belief):
+        """Cache key of a belief: its id if it is a member, else the formula itself"""
+        return self.store.ids.get(belief, belief)
 
     def get_belief_base(self):
         return self.belief_base
 
     def kb_to_cnf(self, kb):
-        """Converts all clauses in a knowledge base to CNF format."""
-        cnf = set()
-        for clause in kb:
-            cnf.add(to_cnf(clause))
-        return cnf
-
-    def negate_literal(self, lit):
-        """Negates a literal"""
-        return ~lit if not isinstance(lit, str) else sympify(f'~{lit}')
-
-    def split(self, operand, formula):
-        """Splits a formula on the given operand (And/Or) and returns a set of subformulas."""
-        if isinstance(formula, operand):
-                return set(formula.args)
-        else:
-            return {formula}
+        """
+        Converts all beliefs in a knowledge base to a set of integer clauses.
+        The clauses of the current belief base are taken from the clause database.
+        """
+        if kb == self.belief_base:
+            return self.clause_db.clauses()
+        return self.clause_db.clauses(kb)
 
     def resolve(self, c1, c2):
         """
-        Resolve two clauses (c1, c2) and return the resolvant.
-        c1, c2: sets of literals.
-        """
-        resolvents = set()
-        c1_literals = self.split(Or, c1)
-        c2_literals = self.split(Or, c2)
-
-        for i in c1_literals:
-            for j in c2_literals:
-                if i == ~j:
-                    # Remove the complementary literals and combine the rest
-                    resolvent = (c1_literals - {i}) | (c2_literals - {j})
-
-                    if not resolvent:  # Empty set means contradiction found
-                        return set()
-                    
-                    # Convert back to Or if multiple literals
-                    resolvent_expr = Or(*resolvent) if len(resolvent) > 1 else next(iter(resolvent))
-                    resolvents.add(resolvent_expr)
-        
-        # If no resolutions, return the original clauses
-        if not resolvents:
-            return {c1, c2} 
-        
-        return resolvents
+        Resolve two clauses (c1, c2) and return the resolvents.
+        c1, c2: frozensets of signed integer literals.
+        """
+        return resolve(c1, c2)
 
-    def resolution(self, beliefs, query):
+    def resolution(self, beliefs, query, budget=None):
         """
         Returns True if beliefs entails query, False otherwise.
+        beliefs |= query iff beliefs & ~query is unsatisfiable, decided by the engine, or by
+        the BDD of the base in compiled mode when beliefs is the whole base.
+        Results are memoized per (set of beliefs, clauses of ~query) until the base changes.
+        budget: resource budget of the check (see budget.py), default self.budget. If it
+        runs out, UNKNOWN (None) is returned.
         """
-        # Convert KB to CNF and flatten
-        kb = self.kb_to_cnf(beliefs)
-        kb_flat = set()
-        
-        for clause in kb:
-            kb_flat.update(self.split(And, clause))
+        with self._bounded(budget):
+            try:
+                return self._entails(beliefs, query)
+            except BudgetExceeded:
+                return UNKNOWN
+
+    def _entailed(self, beliefs, phi):
+        """Entailment check of a contraction, an unknown answer is decided by the on_unknown policy"""
+        try:
+            return self._entails(beliefs, phi)
+        except BudgetExceeded as e:
+            return self._unknown(e)
+
+    def _entails(self, beliefs, query):
+        """resolution() under the limits of the running call, BudgetExceeded if they run out"""
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+
+        negated_query = compile_negation(query, self.encoding)
+
+        if self.entailment_cache is not None:
+            ids = frozenset(self._belief_id(belief) for belief in beliefs)
+            query_key = frozenset(negated_query)
+            cached = self.entailment_cache.lookup(ids, query_key)
+            if cached is not None:
+                if stats is not None:
+                    stats.record('entailment', {'cache_hits': 1}, entailed=cached)
+                return cached
+
+        if self.compiled and beliefs == self.belief_base:
+            entails = self._compiled_entails(query, self._limits)
+            if self.entailment_cache is not None:
+                self.entailment_cache.store(ids, query_key, entails)
+            return entails
+
+        # Convert KB to clauses, negate the query and add it to the KB
+        kb = list(self.kb_to_cnf(self._relevant_beliefs(beliefs, negated_query)))
+        kb.extend(negated_query)
+
+        # ~query alone is not limited, its cost does not depend on the base; so the empty
+        # set is always decided and a contraction always has a remainder
+        limits = self._limits if beliefs else None
+        if stats is None:
+            entails = decide(self.engine, kb, budget=limits)
+        else:
+            counters = {'clauses': len(kb)}
+            converted = time.perf_counter()
+            stats.timings['cnf'] += converted - start
+            try:
+                entails = decide(self.engine, kb, counters, limits)
+            except BudgetExceeded as e:
+                self._record_unknown(counters, e)
+                raise
+            finally:
+                stats.timings['saturation'] += time.perf_counter() - converted
+            stats.record('entailment', counters, entailed=entails)
+
+        if self.entailment_cache is not None:
+            self.entailment_cache.store(ids, query_key, entails)
+        return entails
+
+    def _record_unknown(self, counters, error):
+        """Reports a check that ran out of budget, with the counters it got to"""
+        counters['unknown'] = 1
+        self.stats.record('entailment', counters, entailed=UNKNOWN, exhausted=error.resource)
+
+    def _compiled_entails(self, query, limits):
+        """
+        Entailment by the BDD of the base, the query as equivalent CNF (see bdd.py).
+        The compilation and the traversal are bounded by the limits, BudgetExceeded if they run out.
+        """
+        if self.stats is None:
+            return self.compiled_base(limits).entails(compile_formula(query, 'cnf'), limits)
+        try:
+            compiled = self.compiled_base(limits)
+            with self.stats.phase('bdd'):
+                entails = compiled.entails(compile_formula(query, 'cnf'), limits)
+        except BudgetExceeded as e:
+            self._record_unknown({'bdd_queries': 1}, e)
+            raise
+        self.stats.record('entailment', {'bdd_queries': 1}, entailed=entails)
+        return entails
+
+    def entails_many(self, queries, stream=False, budget=None):
+        """
+        Checks many queries against the current belief base.
+        With an engine that has a session (cdcl), the base is clausified once and one
+        session answers all the queries, so learnt clauses are shared between them. Other
+        engines decide every query as resolution() does, on the beliefs relevant to it. In
+        compiled mode all the queries are answered by the BDD of the base.
+        Returns the list of results in input order, or a generator of them if stream is True.
+        budget: shared by all the queries (see resolution), a query that runs out of it is
+        answered UNKNOWN (None).
+        """
+        results = self._entails_each(queries, self._start(budget))
+        return results if stream else list(results)
 
-        # Negate the query and add to KB
-        negated_query = to_cnf(f"~({query})", simplify=True)
-        for clause in self.split(And, negated_query):
-            kb_flat.add(clause)
-        
-        kb = list(kb_flat)
-
-        while True:
-            new_clauses = set()
-            
-            for ci, cj in combinations(kb, 2):
-                resolvents = self.resolve(ci, cj)
-                # two clauses resolve to yield the empty clause
-                if resolvents == set():
-                    return True
-                
-                # only add if it's not already present
-                for resolvent in resolvents:
-                    if resolvent not in kb and resolvent not in new_clauses:
-                        new_clauses.add(resolvent)
-
-            # there are no new clauses that can be added   
-            if not new_clauses:
-                return False
-            kb.extend(new_clauses)
+    def _entails_each(self, queries, limits):
+        if not self.compiled and not has_session(self.engine):
+            for query in queries:
+                yield self.resolution(self.belief_base, query, limits)
+            return
+
+        ids = frozenset(self._belief_id(belief) for belief in self.belief_base)
+        session = None
+
+        for query in queries:
+            stats = self.stats
+            if stats is not None:
+                start = time.perf_counter()
+
+            negated_query = compile_negation(query, self.encoding)
+            query_key = frozenset(negated_query)
+
+            if self.entailment_cache is not None:
+                cached = self.entailment_cache.lookup(ids, query_key)
+                if cached is not None:
+                    if stats is not None:
+                        stats.record('entailment', {'cache_hits': 1}, entailed=cached)
+                    yield cached
+                    continue
+
+            if self.compiled:
+                try:
+                    entails = self._compiled_entails(query, limits)
+                except BudgetExceeded:
+                    yield UNKNOWN
+                    continue
+                if self.entailment_cache is not None:
+                    self.entailment_cache.store(ids, query_key, entails)
+                yield entails
+                continue
+
+            # the session is only opened once a query is not answered by the cache
+            if session is None:
+                session = open_session(self.engine, self.clause_db.clauses())
+
+            try:
+                if stats is None:
+                    entails = decide_with(session, negated_query, budget=limits)
+                else:
+                    counters = {}
+                    converted = time.perf_counter()
+                    stats.timings['cnf'] += converted - start
+                    try:
+                        entails = decide_with(session, negated_query, counters, limits)
+                    except BudgetExceeded as e:
+                        self._record_unknown(counters, e)
+                        raise
+                    finally:
+                        stats.timings['saturation'] += time.perf_counter() - converted
+                    stats.record('entailment', counters, entailed=entails)
+            except BudgetExceeded:
+                yield UNKNOWN
+                continue
+
+            if self.entailment_cache is not None:
+                self.entailment_cache.store(ids, query_key, entails)
+            yield entails
+
+    def _relevant_beliefs(self, beliefs, clauses):
+        """
+        The beliefs that share symbols with the clauses, directly or through other beliefs
+        of the base (see ClauseDatabase.components). The other beliefs can neither help nor
+        prevent a refutation of the clauses as long as they are consistent, so they are set
+        aside if their components are consistent; otherwise all the beliefs are returned.
+        """
+        relevant = self.clause_db.connected(variables(clauses))
+        if len(relevant) == len(self.clause_db) or not all(belief in self.clause_db for belief in beliefs):
+            return beliefs
+        for component in self.clause_db.components():
+            if component.isdisjoint(relevant) and not component.isdisjoint(beliefs):
+                try:
+                    consistent = self._is_consistent(component)
+                except BudgetExceeded:
+                    # unknown, so the component may be inconsistent
+                    consistent = False
+                if not consistent:
+                    return beliefs
+        return relevant.intersection(beliefs)
+
+    def _is_consistent(self, component):
+        """Whether a connected component of the base is consistent, cached until the next change"""
+        consistent = self._consistency.get(component)
+        if consistent is None:
+            if self.stats is not None:
+                self.stats.counters['consistency_checks'] += 1
+            consistent = not decide(self.engine, list(self.clause_db.clauses(component)), budget=self._limits)
+            self._consistency[component] = consistent
+        return consistent
 
     def concatenate_priorities(self):
-        return self.low_prio | self.mid_prio | self.high_prio
+        return set(self.store.members)
 
-    def contraction(self, phi):
+    def contraction(self, phi, mode='partial_meet', budget=None):
         """
         Contraction: B ÷ ϕ; ϕ is removed from B giving a new belief set B'.
         Contract the belief base by phi, using priority order: low, mid, high.
+        mode selects the contraction operator:
+            - 'partial_meet': intersection of the selected remainders (see _partial_meet_contraction)
+            - 'kernel': removal of an incision into every ϕ-kernel (see _kernel_contraction)
+        budget: resource budget of the whole contraction (see budget.py), default self.budget;
+        the checks that run out of it are decided by the on_unknown policy.
+        """
+        if mode not in ('partial_meet', 'kernel'):
+            raise ValueError(f"Unknown contraction mode '{mode}', choose 'partial_meet' or 'kernel'")
+
+        with self._bounded(budget):
+            # First check if phi is even entailed by the belief base
+            if not self._entailed(self.belief_base, phi):
+                #print(f"{phi} is not entailed by anything in the Belief Base, no contraction needed.")
+                return
+
+            if mode == 'kernel':
+                self._kernel_contraction(phi)
+            else:
+                self._partial_meet_contraction(phi)
+
+    def _partial_meet_contraction(self, phi):
+        """
         Partial meet contraction
             1. Generate remainder set
             2. Apply selection function on the remainder
             3. Intersect selected sets from remainder to get contracted base
         """
-        # First check if phi is even entailed by the belief base
-        if not self.resolution(self.belief_base, phi):
-            #print(f"{phi} is not entailed by anything in the Belief Base, no contraction needed.")
-            return
+        stats = self.stats
+        if stats is not None:
+            examined = stats.counters['subsets_examined']
+            start = time.perf_counter()
 
         # 1. Generate remainder set
         remainder_set = self._compute_remainder_set(phi)
+
+        if stats is not None:
+            selecting = time.perf_counter()
+            stats.timings['remainders'] += selecting - start
+            stats.record_contraction(
+                mode='partial_meet',
+                subsets_examined=stats.counters['subsets_examined'] - examined,
+                remainder_size=len(remainder_set),
+                selection_scores=[self._score(subset) for subset in remainder_set],
+            )
+
         if not remainder_set:
             print("Contraction impossible.")
             return
 
         # 2. Apply selection function on the remainder
         selected_remainder = self._selection_function(remainder_set)
+        if stats is not None:
+            stats.timings['selection'] += time.perf_counter() - selecting
 
         # 3. Intersect selected remainder to get contracted base
         new_belief_base = set.intersection(*selected_remainder)
@@ -162,31 +670,140 @@ class BeliefBase:
         #print("Contracted the belief base.")
         #print("The new belief base: ", self.belief_base)
 
+    def _kernel_contraction(self, phi):
+        """
+        Kernel contraction
+            1. Find the ϕ-kernels (inclusion-minimal subsets that imply ϕ)
+            2. Apply the incision function on the kernels
+            3. Remove the incision from the belief base
+        """
+        stats = self.stats
+        if stats is not None:
+            examined = stats.counters['subsets_examined']
+            start = time.perf_counter()
+
+        # 1. Find the kernels, in the beliefs that share symbols with ϕ
+        relevant = self._relevant_beliefs(self.belief_base, compile_negation(phi, self.encoding))
+        kernels, _ = compute_kernels(relevant, self._subset_entailment(phi), self._expired)
+        if any(not kernel for kernel in kernels):
+            # ϕ is a tautology, the empty set implies it
+            print("Contraction impossible.")
+            return
+
+        # 2. Apply the incision function on the kernels
+        if stats is not None:
+            selecting = time.perf_counter()
+            stats.timings['remainders'] += selecting - start
+        incision = self._incision_function(kernels)
+        if stats is not None:
+            stats.timings['selection'] += time.perf_counter() - selecting
+            stats.record_contraction(
+                mode='kernel',
+                subsets_examined=stats.counters['subsets_examined'] - examined,
+                kernels=len(kernels),
+                incision_size=len(incision),
+            )
+
+        # 3. Remove the incision from the belief base
+        self._update_belief_base(self.belief_base - incision)
+
+    def _priority_rank(self, belief):
+        """Priority level of a belief (low = 1, mid = 2, high = 3 or any other number)"""
+        return self.store.level(belief)
+
+    def _incision_function(self, kernels):
+        """
+        Select the lowest-priority belief of every kernel (by level, so low < mid < high).
+        Ties are broken in favour of a belief that is already cut, so that fewer beliefs are lost.
+        """
+        incision = set()
+        for kernel in sorted(kernels, key=len):
+            cut = min(kernel, key=lambda belief: (self._priority_rank(belief), belief not in incision, str(belief)))
+            incision.add(cut)
+        return incision
+
     def _compute_remainder_set(self, phi):
         """
         Compute the remainder set of the belief base.
         A⊥ϕ: set of inclusion-maximal subsets of A that do not imply ϕ
+        Only the beliefs that share symbols with ϕ are split, the others (the rest, consistent
+        and independent of ϕ) are part of every remainder.
         """
-        remainder_set = []
-        beliefs = list(self.belief_base)
+        relevant = self._relevant_beliefs(self.belief_base, compile_negation(phi, self.encoding))
+        rest = self.belief_base - relevant
 
-        # iterate through all the subsets from largest to smallest
-        for r in range(len(beliefs), 0, -1):
-            for subset in combinations(beliefs, r):
-                subset = set(subset)
-                # check if the subset implies phi
-                if not self.resolution(subset, phi):
-                    to_remove = []
+        if self.remainders == 'subsets':
+            remainder_set = self._compute_remainder_set_by_subsets(phi, relevant)
+        else:
+            _, remainder_set = compute_kernels(relevant, self._subset_entailment(phi), self._expired)
+        return [remainder | rest for remainder in remainder_set] if rest else remainder_set
+
+    def _subset_entailment(self, phi):
+        """entails(subset) for the kernel computation, counting the examined subsets in the stats"""
+        def entails(subset):
+            if self.stats is not None:
+                self.stats.counters['subsets_examined'] += 1
+            return self._entailed(subset, phi)
+        return entails
+
+    def _compute_remainder_set_by_subsets(self, phi, beliefs):
+        """
+        Compute A⊥ϕ by checking the subsets of the beliefs from largest to smallest.
+        The subsets of one size are independent, with workers > 1 they are checked in a process pool.
+        """
+        beliefs = list(beliefs)
 
-                    # if it is a subset of one of the sets in remainder, mark that set for removal
-                    for existing in remainder_set:
-                        if subset.issubset(existing):
-                            to_remove.append(existing)
-                    for remove in to_remove:
-                        remainder_set.remove(remove)
+        if self.workers and self.workers > 1:
+            if self._checker is None:
+                self._checker = SubsetChecker(self.workers)
+            checker = self._checker
+            checker.set_problem(self.engine, [self.clause_db.clauses([belief]) for belief in beliefs],
+                                compile_negation(phi, self.encoding), self._limits)
 
-                    remainder_set.append(subset)
-        return remainder_set
+            def checked_each(subsets):
+                return [self._unknown(result) if isinstance(result, BudgetExceeded) else result
+                        for result in checker.entails_each(subsets)]
+            return self._remainders_by_level(beliefs, checked_each)
+
+        def entails_each(subsets):
+            return [self._entailed({beliefs[i] for i in subset}, phi) for subset in subsets]
+
+        return self._remainders_by_level(beliefs, entails_each)
+
+    def _remainders_by_level(self, beliefs, entails_each):
+        """
+        Iterate through the subsets from largest to smallest, one size at a time.
+        entails_each(subsets) decides a list of subsets given as tuples of indices into beliefs.
+        """
+        remainders = []
+        expired = None  # once the deadline has passed, the on_unknown answer of every check
+
+        for r in range(len(beliefs), -1, -1):
+            if expired is None and r:
+                expired = self._expired()
+            if expired and r:
+                # every subset is taken to entail ϕ, only the empty set is still checked
+                continue
+
+            # a subset of a remainder found earlier is not maximal
+            subsets = [subset for subset in combinations(range(len(beliefs)), r)
+                       if not any(remainder.issuperset(subset) for remainder in remainders)]
+            if not subsets:
+                continue
+            if self.stats is not None:
+                self.stats.counters['subsets_examined'] += len(subsets)
+
+            if expired is False:
+                # taken not to entail ϕ: these subsets are the last maximal ones
+                remainders.extend(frozenset(subset) for subset in subsets)
+                break
+
+            # check which subsets imply phi
+            for subset, entailed in zip(subsets, entails_each(subsets)):
+                if not entailed:
+                    remainders.append(frozenset(subset))
+
+        return [{beliefs[i] for i in remainder} for remainder in remainders]
 
     def _selection_function(self, remainder_set):
         """
@@ -195,19 +812,8 @@ class BeliefBase:
         if not remainder_set:
             return []
 
-        scored_remainder = []
-        for subset in remainder_set:
-            # weighted priority point low > mid > high
-            prio_point = (
-                10 * len(subset & self.low_prio) + 
-                5 * len(subset & self.mid_prio) + 
-                1 * len(subset & self.high_prio)
-            )
+        scored_remainder = [(self._score(subset), subset) for subset in remainder_set]
 
-            # normalize by length
-            score = prio_point / len(subset) if subset else 0
-            scored_remainder.append((score, subset))
-                
         if not any(score for score, _ in scored_remainder):
             return remainder_set
 
@@ -215,14 +821,33 @@ class BeliefBase:
         max_score = max(score for score, _ in scored_remainder)
         return [r for score, r in scored_remainder if score == max_score]
 
+    def _score(self, subset):
+        """Score of a remainder for the selection function"""
+        # weighted priority point low > mid > high
+        prio_point = (
+            10 * len(subset & self.low_prio) + 
+            5 * len(subset & self.mid_prio) + 
+            1 * len(subset & self.high_prio)
+        )
+
+        # normalize by length
+        return prio_point / len(subset) if subset else 0
+
     def _update_belief_base(self, new_beliefs):
         """
-        Update the actual belief sets with temporary sets.
+        Update the belief store with a new set of beliefs (a subset of the current one).
         """
-        self.belief_base = new_beliefs
-        self.low_prio = self.low_prio & new_beliefs
-        self.mid_prio = self.mid_prio & new_beliefs
-        self.high_prio = self.high_prio & new_beliefs
+        self._before_write()
+        if len(new_beliefs) < len(self.store.members):
+            self._bdd = None
+        if self._journaling():
+            for formula in self.store.members:
+                if formula not in new_beliefs:
+                    self._journal.append(('remove', formula, self.store.level(formula),
+                                          self.store.ids[formula], self.clause_db.by_belief[formula]))
+        self.store.retain(new_beliefs)
+        self.clause_db.retain(new_beliefs)
+        self._invalidate()
 
     def expansion(self, phi, priority='high'):
         """
@@ -233,18 +858,118 @@ class BeliefBase:
         #print(f"Expanded belief base with: {phi}")
 
 
-    def revision(self, phi, priority='high'):
+    def revision(self, phi, priority='high', mode='partial_meet', budget=None):
         """
         Revises the belief base by phi using Levi Identity:
         B * phi := (B ÷ ¬phi) + phi
         priority is an optional parameter, use high as default, to prioritize new information
+        mode is the contraction operator used for B ÷ ¬phi, 'partial_meet' or 'kernel',
+        or 'entrenchment' for the linear revision of _entrenchment_revision
+        budget: as for contraction, shared by the contraction and the expansion
         """
         #print(f"\n--- Revision with: {phi} ---")
-    
-        # Step 1: Contract the belief base by ¬phi
-        neg_phi = to_cnf(f"~({phi})", simplify=True)
-        #print(f"Contracting by: {neg_phi}")
-        self.contraction(neg_phi)
+        with self._bounded(budget):
+            if mode == 'entrenchment':
+                self._entrenchment_revision(phi, priority)
+                return
+
+            # Step 1: Contract the belief base by ¬phi
+            neg_phi = negation(phi)
+            #print(f"Contracting by: {neg_phi}")
+            self.contraction(neg_phi, mode)
 
-        # Step 2: Expand with phi
+            # Step 2: Expand with phi
+            self.expansion(phi, priority)
+
+    def _entrenchment_revision(self, phi, priority):
+        """
+        Revision without a remainder set: phi is added first, then the beliefs are inserted
+        again from the most to the least entrenched (highest level first, then oldest), and
+        each one is kept only if it is consistent with phi and the beliefs kept so far.
+        One incremental CDCL solver holds the clauses of every belief behind a selector
+        literal, so every check is a single solve under assumptions: at most n + 1 solver
+        calls for n beliefs, and the learnt clauses are kept between them. The selectors are
+        given back to the symbol table at the end.
+        """
+        solver = Solver(compile_formula(phi, self.encoding))
+        ranked = sorted(self.belief_base, key=lambda belief: (-self._priority_rank(belief), self.store.ids[belief]))
+        selectors = {}
+        try:
+            for belief in ranked:
+                selector = selectors[belief] = symbols.fresh()
+                for clause in self.clause_db.by_belief[belief]:
+                    solver.add_clause(list(clause) + [-selector])
+
+            def consistent(assumptions):
+                try:
+                    return solver.solve(assumptions, self._limits)
+                except BudgetExceeded as e:
+                    # unknown: 'entailed' means that ¬phi is taken to follow, i.e. inconsistent
+                    return not self._unknown(e)
+
+            # consistent with the whole base: B ÷ ¬phi = B and the revision is an expansion
+            calls = 1
+            if consistent([selectors[belief] for belief in ranked]):
+                kept = ranked
+            else:
+                kept = []
+                assumptions = []
+                for belief in ranked:
+                    calls += 1
+                    if consistent(assumptions + [selectors[belief]]):
+                        kept.append(belief)
+                        assumptions.append(selectors[belief])
+                    else:
+                        # the belief is dropped, its clauses are satisfied from now on
+                        solver.add_clause([-selectors[belief]])
+        finally:
+            # the solver is done with them, other solvers may use the selectors again
+            symbols.release(selectors.values())
+
+        if self.stats is not None:
+            self.stats.record_contraction(
+                mode='entrenchment',
+                solver_calls=calls,
+                removed=len(ranked) - len(kept),
+            )
+        if len(kept) < len(ranked):
+            self._update_belief_base(set(kept))
         self.expansion(phi, priority)
+
+    def revise_many(self, formulas, priority='high', mode='partial_meet', budget=None):
+        """
+        Revises the belief base by each formula in turn, same result as calling revision
+        for each of them. formulas may be strings or (formula, priority) pairs.
+        While the new formulas are consistent with the belief base, B ÷ ¬phi = B and the
+        revision is a plain expansion. With an engine that has a session (cdcl), these
+        consistency checks share one session that is extended with every expansion, and only
+        rebuilt after a real contraction.
+        Returns the number of formulas that needed a contraction.
+        budget: shared by all the revisions (see revision). If BudgetExceeded is raised,
+        the formulas before the one that ran out of budget stay revised.
+        """
+        session = None
+        contracted = 0
+        with self._bounded(budget):
+            for phi in formulas:
+                phi, level = phi if isinstance(phi, tuple) else (phi, priority)
+                phi_clauses = compile_formula(phi, self.encoding)
+                if not has_session(self.engine):
+                    inconsistent = self._entailed(self.belief_base, negation(phi))
+                else:
+                    if session is None:
+                        session = open_session(self.engine, self.clause_db.clauses())
+                    try:
+                        inconsistent = decide_with(session, phi_clauses, budget=self._limits)
+                    except BudgetExceeded as e:
+                        inconsistent = self._unknown(e)
+                if not inconsistent:
+                    # B does not entail ¬phi, nothing to contract
+                    self.expansion(phi, level)
+                    if session is not None:
+                        session.add(phi_clauses)
+                else:
+                    self.revision(phi, level, mode)
+                    contracted += 1
+                    session = None
+        return contracted
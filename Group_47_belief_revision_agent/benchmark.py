@@ -0,0 +1,219 @@
+"""
+Scaling benchmarks for resolution, contraction, revision and expansion.
+
+Belief bases are generated from a seed (random k-CNF or Horn clauses) for a range of
+sizes, every operation is timed separately on a fresh copy of the base, and the results
+are written as JSON so runs of different commits can be compared. Every operation runs
+under a deadline (--stop-after), an operation that runs out of it is recorded as timed out
+and the larger sizes are skipped, so the suite always terminates:
+
+    python benchmark.py --engine cdcl --sizes 10 20 50 100 --output before.json
+"""
+import argparse
+import json
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from beliefbase import BeliefBase
+from budget import Budget, BudgetExceeded
+from clauses import cnf_cache
+from engines import ENGINES, PreprocessingEngine, get_engine
+from formulas import ENCODINGS
+
+
+# --- Generators ---
+
+def random_kcnf(size, seed, k=3, ratio=2.0):
+    """size beliefs, each a random clause of k literals over size / ratio variables"""
+    rng = random.Random(seed)
+    num_vars = max(k + 1, int(size / ratio))
+    beliefs = []
+    while len(beliefs) < size:
+        atoms = rng.sample(range(num_vars), k)
+        belief = ' | '.join(f"{rng.choice(['', '~'])}x{atom}" for atom in atoms)
+        if belief not in beliefs:
+            beliefs.append(belief)
+    priorities = [rng.choice(['low', 'mid', 'high']) for _ in beliefs]
+    return list(zip(beliefs, priorities))
+
+
+def random_horn(size, seed, max_body=3):
+    """size beliefs: about a fifth are facts, the rest rules 'a & b >> c' over size / 2 atoms"""
+    rng = random.Random(seed)
+    num_atoms = max(max_body + 2, size // 2)
+    num_facts = max(1, size // 5)
+    beliefs = [f"x{atom}" for atom in rng.sample(range(num_atoms), min(num_facts, num_atoms))]
+    while len(beliefs) < size:
+        atoms = rng.sample(range(num_atoms), rng.randint(2, max_body + 1))
+        head, body = atoms[0], atoms[1:]
+        belief = f"({' & '.join(f'x{atom}' for atom in body)}) >> x{head}"
+        if belief not in beliefs:
+            beliefs.append(belief)
+    priorities = [rng.choice(['low', 'mid', 'high']) for _ in beliefs]
+    return list(zip(beliefs, priorities))
+
+
+GENERATORS = {
+    'kcnf': random_kcnf,
+    'horn': random_horn,
+}
+
+
+# --- Operations ---
+
+def pick_query(operation, beliefs, seed):
+    """
+    The query of an operation: a random disjunction of two literals for resolution,
+    otherwise one of the beliefs, so that contraction and revision have work to do.
+    """
+    rng = random.Random(seed)
+    if operation == 'resolution':
+        atoms = sorted({atom for belief, _ in beliefs for atom in re.findall(r'x\d+', belief)})
+        return ' | '.join(f"{rng.choice(['', '~'])}{atom}" for atom in rng.sample(atoms, 2))
+    return rng.choice(beliefs)[0]
+
+
+def op_resolution(base, query):
+    if base.resolution(base.belief_base, query) is None:
+        raise BudgetExceeded('deadline')
+
+
+def op_contraction(base, query):
+    base.contraction(query)
+
+
+def op_revision(base, query):
+    base.revision(f"~({query})")
+
+
+def op_expansion(base, query):
+    base.expansion(f"{query} | extra")
+
+
+OPERATIONS = {
+    'resolution': op_resolution,
+    'contraction': op_contraction,
+    'revision': op_revision,
+    'expansion': op_expansion,
+}
+
+
+def measure(operation, beliefs, query, engine, memory, encoding='cnf', preprocess=None, stop_after=None):
+    """
+    Runs the operation on a fresh base with an empty CNF cache, returns one result row.
+    With stop_after, the operation runs under a deadline of that many seconds; if it
+    runs out, the row has timed_out set and no peak memory.
+    """
+    budget = Budget(deadline=stop_after) if stop_after is not None else None
+    cnf_cache.clear()
+    base = BeliefBase(beliefs, engine=engine, encoding=encoding, preprocess=preprocess, budget=budget)
+    beliefs_before = len(base.belief_base)
+    clauses_before = len(base.clause_db.clauses())
+
+    start = time.perf_counter()
+    try:
+        OPERATIONS[operation](base, query)
+        timed_out = False
+    except BudgetExceeded:
+        timed_out = True
+    seconds = time.perf_counter() - start
+
+    row = {
+        'seconds': seconds,
+        'timed_out': timed_out,
+        'beliefs_before': beliefs_before,
+        'beliefs_after': len(base.belief_base),
+        'clauses_before': clauses_before,
+        'clauses_after': len(base.clause_db.clauses()),
+    }
+
+    if memory and not timed_out:
+        # second run under tracemalloc, which slows the code down too much to time it
+        cnf_cache.clear()
+        base = BeliefBase(beliefs, engine=engine, encoding=encoding, preprocess=preprocess)
+        tracemalloc.start()
+        OPERATIONS[operation](base, query)
+        row['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return row
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(generators, sizes, operations, engine, seed, memory=True, stop_after=None, encoding='cnf',
+        preprocess=None):
+    """Runs every operation on every generated base, returns the JSON document as a dict"""
+    results = []
+    for generator in generators:
+        for operation in operations:
+            for size in sizes:
+                beliefs = GENERATORS[generator](size, seed)
+                query = pick_query(operation, beliefs, seed)
+                row = measure(operation, beliefs, query, engine, memory, encoding, preprocess, stop_after)
+                row.update({'generator': generator, 'size': size, 'operation': operation})
+                results.append(row)
+                print(f"{generator:5} {operation:12} size {size:5}: {row['seconds']:.4f}s"
+                      + (" (timed out)" if row['timed_out'] else ""), file=sys.stderr)
+
+                # larger sizes would take even longer
+                if row['timed_out']:
+                    break
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'engine': engine,
+            'encoding': encoding,
+            'preprocess': isinstance(get_engine(engine, preprocess), PreprocessingEngine),
+            'stop_after': stop_after,
+            'seed': seed,
+            'python': platform.python_version(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Belief base scaling benchmarks")
+    parser.add_argument("--engine", choices=list(ENGINES), default="resolution")
+    parser.add_argument("--encoding", choices=list(ENCODINGS), default="cnf")
+    parser.add_argument("--generators", nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--operations", nargs='+', choices=list(OPERATIONS), default=list(OPERATIONS))
+    parser.add_argument("--sizes", nargs='+', type=int, default=[5, 10, 20, 50, 100, 200])
+    parser.add_argument("--preprocess", action=argparse.BooleanOptionalAction, default=None,
+                        help="simplify the clauses before the engine sees them (default: on for "
+                             "resolution, off for cdcl)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action='store_true', help="skip the tracemalloc peak memory run")
+    parser.add_argument("--stop-after", type=float, default=60.0,
+                        help="deadline of every operation (seconds); the larger sizes of an "
+                             "operation that runs out of it are skipped")
+    parser.add_argument("--output", help="JSON file for the results (default: stdout)")
+    args = parser.parse_args()
+
+    report = run(args.generators, args.sizes, args.operations, args.engine, args.seed,
+                 memory=not args.no_memory, stop_after=args.stop_after, encoding=args.encoding,
+                 preprocess=args.preprocess)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
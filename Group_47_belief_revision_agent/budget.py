@@ -0,0 +1,72 @@
+"""
+Resource budgets for entailment checks and contractions.
+
+A Budget limits one call of BeliefBase.resolution, entails_many, contraction or revision:
+    - deadline: seconds from the start of the call, shared by all the checks it makes
+    - max_clauses: clauses an engine may hold in one check (kept and derived ones)
+    - max_memory: estimated bytes of these clauses (sys.getsizeof of every clause)
+None leaves a resource unlimited. The engines check the budget in their main loop and
+raise BudgetExceeded when it runs out; the belief base turns that into the answer UNKNOWN
+(None) of an entailment check, or applies its on_unknown policy during a contraction.
+"""
+import sys
+import time
+
+UNKNOWN = None
+ON_UNKNOWN = ('raise', 'entailed', 'not_entailed')
+
+
+class BudgetExceeded(Exception):
+    """A check ran out of budget; resource is 'deadline', 'clauses' or 'memory'"""
+    def __init__(self, resource):
+        super().__init__(resource)
+        self.resource = resource
+
+    def __str__(self):
+        return f"{self.resource} budget exhausted"
+
+
+class Budget:
+    def __init__(self, deadline=None, max_clauses=None, max_memory=None):
+        for name, value in (('deadline', deadline), ('max_clauses', max_clauses), ('max_memory', max_memory)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value!r}")
+        self.deadline = deadline
+        self.max_clauses = max_clauses
+        self.max_memory = max_memory
+
+    def __repr__(self):
+        return f"Budget(deadline={self.deadline}, max_clauses={self.max_clauses}, max_memory={self.max_memory})"
+
+    def start(self):
+        """The limits of a call starting now"""
+        expires = None if self.deadline is None else time.monotonic() + self.deadline
+        return Limits(expires, self.max_clauses, self.max_memory)
+
+
+class Limits:
+    """A started budget, what the engines check; it can be sent to worker processes"""
+    __slots__ = ('expires', 'max_clauses', 'max_memory')
+
+    def __init__(self, expires, max_clauses, max_memory):
+        self.expires = expires
+        self.max_clauses = max_clauses
+        self.max_memory = max_memory
+
+    def start(self):
+        # the checks of a contraction share the limits of the whole call
+        return self
+
+    def check(self, clauses=0, memory=0):
+        """Raises BudgetExceeded if the deadline has passed or clauses/memory are over the limits"""
+        if self.expires is not None and time.monotonic() > self.expires:
+            raise BudgetExceeded('deadline')
+        if self.max_clauses is not None and clauses > self.max_clauses:
+            raise BudgetExceeded('clauses')
+        if self.max_memory is not None and memory > self.max_memory:
+            raise BudgetExceeded('memory')
+
+
+def clause_size(clause):
+    """Estimated bytes of a clause for the max_memory budget"""
+    return sys.getsizeof(clause)
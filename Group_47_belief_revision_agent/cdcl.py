@@ -0,0 +1,332 @@
+import heapq
+from budget import clause_size
+
+
+def luby(i):
+    """i-th element (from 0) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ..."""
+    size, seq = 1, 0
+    while size < i + 1:
+        seq += 1
+        size = 2 * size + 1
+    while size - 1 != i:
+        size = (size - 1) // 2
+        seq -= 1
+        i %= size
+    return 2 ** seq
+
+
+class Solver:
+    """
+    Conflict driven clause learning SAT solver on integer clauses.
+    - unit propagation with two watched literals (the first two literals of every clause)
+    - first-UIP clause learning and non-chronological backjumping
+    - VSIDS variable activity with phase saving
+    - Luby restarts, the longer half of the learnt clauses is dropped on restart
+    Clauses can be added between calls to solve(), and solve() accepts assumption literals,
+    so one solver (and its learnt clauses) can answer a sequence of related questions.
+    solve() takes an optional budget (see budget.py), checked at every conflict against the
+    original and learnt clauses; the solver stays usable after BudgetExceeded.
+    The variables of the clauses and assumptions are numbered densely inside the solver, so
+    its cost depends on the variables of the instance, not on the size of the symbol table.
+    """
+    restart_base = 100
+    var_decay = 0.95
+
+    def __init__(self, clauses=()):
+        self.ok = True          # False once the clauses are unsatisfiable at level 0
+        self.clauses = []
+        self.learnts = []
+        self.memory = 0         # estimated bytes of the clauses and learnt clauses
+        self.watches = {}       # literal -> clauses watching it
+        self.local = {}         # variable of the caller -> variable of the solver
+        self.external = [0]     # variable of the solver -> variable of the caller
+        self.assigns = [0]      # var -> 1 (true), -1 (false) or 0 (unassigned)
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.polarity = [-1]
+        self.order = []         # heap of (-activity, var), may hold stale entries
+        self.var_inc = 1.0
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    # --- Variables and assignment ---
+
+    def _literal(self, lit):
+        """The solver literal of a literal of the caller, allocating its variable if needed"""
+        var = self.local.get(abs(lit))
+        if var is None:
+            var = self.local[abs(lit)] = len(self.assigns)
+            self.external.append(abs(lit))
+            self.assigns.append(0)
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.polarity.append(-1)
+            heapq.heappush(self.order, (0.0, var))
+        return var if lit > 0 else -var
+
+    def value(self, lit):
+        """1 if the solver literal lit is true, -1 if false, 0 if unassigned"""
+        return self.assigns[lit] if lit > 0 else -self.assigns[-lit]
+
+    def counters(self):
+        return {'conflicts': self.conflicts, 'decisions': self.decisions,
+                'propagations': self.propagations, 'restarts': self.restarts,
+                'learnts': len(self.learnts)}
+
+    def model(self):
+        """Set of true literals (of the caller) of the last satisfying assignment"""
+        return {self.external[var] if val > 0 else -self.external[var]
+                for var, val in enumerate(self.assigns) if var and val}
+
+    def _enqueue(self, lit, reason):
+        var = abs(lit)
+        self.assigns[var] = 1 if lit > 0 else -1
+        self.level[var] = len(self.trail_lim)
+        self.reason[var] = reason
+        self.trail.append(lit)
+
+    def _cancel_until(self, level):
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.polarity[var] = self.assigns[var]
+            self.assigns[var] = 0
+            self.reason[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    # --- Clauses ---
+
+    def _watch(self, clause):
+        self.watches.setdefault(clause[0], []).append(clause)
+        self.watches.setdefault(clause[1], []).append(clause)
+
+    def add_clause(self, lits):
+        """Adds a clause, returns False if the clause set became unsatisfiable."""
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+
+        lits = {self._literal(lit) for lit in lits}
+        clause = []
+        for lit in lits:
+            if -lit in lits:
+                return True  # tautology
+            val = self.value(lit)
+            if val == 1:
+                return True  # already satisfied at level 0
+            if val == 0:
+                clause.append(lit)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.ok = self._propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.memory += clause_size(clause)
+            self._watch(clause)
+        return self.ok
+
+    # --- Search ---
+
+    def _propagate(self):
+        """Unit propagation, returns a conflicting clause or None"""
+        trail = self.trail
+        assigns = self.assigns
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            self.propagations += 1
+            watchers = self.watches.get(false_lit)
+            if not watchers:
+                continue
+
+            kept = []
+            i = 0
+            while i < len(watchers):
+                clause = watchers[i]
+                i += 1
+                # make sure the false literal is clause[1]
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_val = assigns[first] if first > 0 else -assigns[-first]
+                if first_val == 1:
+                    kept.append(clause)
+                    continue
+
+                # look for a new literal to watch
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (assigns[lit] if lit > 0 else -assigns[-lit]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        self.watches.setdefault(lit, []).append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_val == -1:
+                        kept.extend(watchers[i:])
+                        self.watches[false_lit] = kept
+                        self.qhead = len(trail)
+                        return clause
+                    self._enqueue(first, clause)
+
+            self.watches[false_lit] = kept
+        return None
+
+    def _bump(self, var):
+        self.activity[var] += self.var_inc
+        if self.activity[var] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.var_inc *= 1e-100
+            self.order = [(-a, v) for v, a in enumerate(self.activity) if v and not self.assigns[v]]
+            heapq.heapify(self.order)
+        elif not self.assigns[var]:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def _analyze(self, conflict):
+        """First-UIP conflict analysis, returns the learnt clause and the backjump level"""
+        current = len(self.trail_lim)
+        seen = set()
+        learnt = [None]
+        counter = 0
+        lit = None
+        clause = conflict
+        index = len(self.trail) - 1
+
+        while True:
+            # the implied literal of a reason clause is clause[0]
+            for q in clause[0 if lit is None else 1:]:
+                var = abs(q)
+                if var not in seen and self.level[var] > 0:
+                    seen.add(var)
+                    self._bump(var)
+                    if self.level[var] >= current:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+
+            # next literal of the current level to resolve on
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            seen.discard(abs(lit))
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reason[abs(lit)]
+
+        learnt[0] = -lit
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # watch the literal with the highest level after the asserting one
+        best = max(range(1, len(learnt)), key=lambda i: self.level[abs(learnt[i])])
+        learnt[1], learnt[best] = learnt[best], learnt[1]
+        return learnt, self.level[abs(learnt[1])]
+
+    def _pick_branch_lit(self):
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if not self.assigns[var]:
+                return var if self.polarity[var] > 0 else -var
+        return None
+
+    def _reduce_learnts(self):
+        """Keeps the shorter half of the learnt clauses; only called at level 0."""
+        self.learnts.sort(key=len)
+        self.learnts = self.learnts[:len(self.learnts) // 2 + 1]
+        self.memory = sum(clause_size(clause) for clause in self.clauses + self.learnts)
+        self.watches = {}
+        for clause in self.clauses + self.learnts:
+            self._watch(clause)
+
+    def solve(self, assumptions=(), budget=None):
+        """
+        Returns True if the clauses are satisfiable, False otherwise.
+        assumptions: literals that are made true as the first decisions; a False result
+        with assumptions only means that there is no model containing all of them.
+        """
+        if not self.ok:
+            return False
+        self._cancel_until(0)
+        assumptions = [self._literal(lit) for lit in assumptions]
+        if self._propagate() is not None:
+            self.ok = False
+            return False
+
+        restarts = 0
+        limit = luby(restarts) * self.restart_base
+        max_learnts = max(len(self.clauses) // 3, 1000)
+
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                limit -= 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+
+                if budget is not None:
+                    budget.check(len(self.clauses) + len(self.learnts), self.memory)
+
+                learnt, backjump = self._analyze(conflict)
+                self._cancel_until(backjump)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.memory += clause_size(learnt)
+                    self._watch(learnt)
+                    self._enqueue(learnt[0], learnt)
+                self.var_inc /= self.var_decay
+
+            elif limit <= 0:
+                # restart
+                restarts += 1
+                self.restarts += 1
+                limit = luby(restarts) * self.restart_base
+                self._cancel_until(0)
+                if len(self.learnts) > max_learnts:
+                    self._reduce_learnts()
+                    max_learnts = int(max_learnts * 1.1)
+
+            else:
+                # the assumptions are the first decisions, one decision level each
+                lit = None
+                while len(self.trail_lim) < len(assumptions):
+                    assumption = assumptions[len(self.trail_lim)]
+                    val = self.value(assumption)
+                    if val == 1:
+                        self.trail_lim.append(len(self.trail))
+                    elif val == -1:
+                        return False
+                    else:
+                        lit = assumption
+                        break
+
+                if lit is None:
+                    lit = self._pick_branch_lit()
+                    if lit is None:
+                        return True
+                    self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(lit, None)
@@ -0,0 +1,363 @@
+import threading
+from collections import OrderedDict
+from formulas import compile_text, ENCODINGS
+
+# Formula strings are compiled by the native parser of formulas.py. sympy is optional: it
+# is only imported, on first use, to compile formulas given as sympy expressions.
+
+
+class SymbolTable:
+    """
+    Maps propositional symbols to positive integers and back. Variables are allocated
+    under a lock, the server compiles queries while a mutation runs in another thread.
+    """
+    def __init__(self):
+        self.ids = {}
+        self.names = [None]  # variable 0 is never used, -0 == 0
+        self.free = []       # released nameless variables, handed out again by fresh()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names) - 1
+
+    def id(self, name):
+        """Return the variable number of a symbol name, allocating one if needed"""
+        var = self.ids.get(name)
+        if var is None:
+            with self.lock:
+                var = self.ids.get(name)
+                if var is None:
+                    var = len(self.names)
+                    self.names.append(name)
+                    self.ids[name] = var
+        return var
+
+    def name(self, var):
+        return self.names[abs(var)]
+
+    def fresh(self):
+        """Allocates a variable without a name (e.g. a selector literal of a solver)"""
+        with self.lock:
+            if self.free:
+                return self.free.pop()
+            self.names.append(None)
+            return len(self.names) - 1
+
+    def release(self, variables):
+        """Gives back nameless variables of fresh() that no clause in use refers to anymore"""
+        with self.lock:
+            self.free.extend(variables)
+
+
+# one table per process so that compiled clauses can be shared between bases
+symbols = SymbolTable()
+
+
+def literal(expr):
+    """Converts a sympy literal (p or ~p) to a signed integer"""
+    from sympy.logic.boolalg import Not
+    if isinstance(expr, Not):
+        return -symbols.id(expr.args[0].name)
+    return symbols.id(expr.name)
+
+
+def clauses_from_cnf(cnf):
+    """
+    Converts a sympy formula that is already in CNF to a list of clauses.
+    Each clause is a frozenset of signed integers; the empty clause is a contradiction.
+    """
+    from sympy.logic.boolalg import And, Or, BooleanTrue, BooleanFalse
+    if isinstance(cnf, BooleanTrue):
+        return []
+    if isinstance(cnf, BooleanFalse):
+        return [frozenset()]
+
+    conjuncts = cnf.args if isinstance(cnf, And) else (cnf,)
+    clauses = []
+    for conjunct in conjuncts:
+        disjuncts = conjunct.args if isinstance(conjunct, Or) else (conjunct,)
+        clauses.append(frozenset(literal(lit) for lit in disjuncts))
+    return clauses
+
+
+def sympy_cnf(expr, negate=False):
+    """CNF of a sympy expression (or of its negation) computed by sympy"""
+    from sympy.logic.boolalg import to_cnf, Not
+    return to_cnf(Not(expr) if negate else expr)
+
+
+class CNFCache:
+    """
+    LRU cache of compiled formulas, keyed by the formula text (or sympy expression) and
+    the encoding (see formulas.py). Each entry holds the integer clauses of the formula or
+    of its negation. The entries are updated under a lock, formulas are compiled outside.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, formula, negate=False, encoding='cnf'):
+        """
+        Returns the clauses of the formula, or of ~(formula) if negate is True.
+        sympy expressions are always converted by sympy's to_cnf, whatever the encoding.
+        """
+        key = (negate, encoding, formula)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry
+            self.misses += 1
+
+        if isinstance(formula, str):
+            entry = compile_text(formula, symbols, negate, encoding)
+        else:
+            entry = tuple(clauses_from_cnf(sympy_cnf(formula, negate)))
+
+        with self.lock:
+            self.entries[key] = entry
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clauses(self, formula, negate=False, encoding='cnf'):
+        return self.get(formula, negate, encoding)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# compiled formulas are shared by every belief base of the process
+cnf_cache = CNFCache()
+
+
+def compile_formula(formula, encoding='cnf'):
+    """Parses a formula (string or sympy expression) into a tuple of integer clauses."""
+    return cnf_cache.clauses(formula, encoding=encoding)
+
+
+def negation(formula):
+    """~(formula), as text for a formula string"""
+    return f"~({formula})" if isinstance(formula, str) else ~formula
+
+
+def compile_negation(formula, encoding='cnf'):
+    """Clauses of ~(formula), used for the refutation of a query"""
+    return cnf_cache.clauses(formula, negate=True, encoding=encoding)
+
+
+class ClauseDatabase:
+    """
+    Live clause database of a belief base.
+    Every clause is tagged with the beliefs it came from, so that the clauses of the
+    whole base are available without clausifying anything at query time.
+    Beliefs are compiled with the given encoding (see formulas.py) unless clauses are given.
+    A variable -> beliefs index splits the base into the connected components of beliefs
+    that share symbols, directly or through other beliefs. The components are kept up to
+    date: adding a belief merges the components it connects (the smaller ones into the
+    largest), retracting one re-splits only its own component.
+    copy() only copies the outer dicts: the sets of beliefs in them are shared with the
+    copy, and each database copies one of them the first time it changes it.
+    """
+    def __init__(self, encoding='cnf'):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown CNF encoding '{encoding}', choose from: {', '.join(ENCODINGS)}")
+        self.encoding = encoding
+        self.by_belief = {}   # belief -> tuple of clauses
+        self.sources = {}     # clause -> set of beliefs that produced it
+        self.by_variable = {} # variable -> set of beliefs whose clauses use it
+        self._components = {}   # component key -> set of beliefs
+        self._component_of = {} # belief -> component key
+        self._frozen = {}       # component key -> frozenset, for the unchanged components
+        self._next_key = 0
+        # keys whose sets this database may change in place, the others may be shared
+        self._own_sources = set()
+        self._own_variables = set()
+        self._own_components = set()
+
+    def __len__(self):
+        return len(self.by_belief)
+
+    def __contains__(self, belief):
+        return belief in self.by_belief
+
+    def add(self, belief, clauses=None):
+        """Adds the clauses of a belief, compiled here unless they are given"""
+        if belief in self.by_belief:
+            return
+        if clauses is None:
+            clauses = compile_formula(belief, self.encoding)
+        self.by_belief[belief] = clauses
+        for clause in clauses:
+            _writable(self.sources, self._own_sources, clause).add(belief)
+        belief_variables = variables(clauses)
+        touched = {self._component_of[other] for var in belief_variables for other in self.by_variable.get(var, ())}
+        for var in belief_variables:
+            _writable(self.by_variable, self._own_variables, var).add(belief)
+        self._merge(belief, touched)
+
+    def retract(self, belief):
+        clauses = self.by_belief.pop(belief, ())
+        for clause in clauses:
+            sources = _writable(self.sources, self._own_sources, clause)
+            sources.discard(belief)
+            if not sources:
+                del self.sources[clause]
+                self._own_sources.discard(clause)
+        for var in variables(clauses):
+            beliefs = _writable(self.by_variable, self._own_variables, var)
+            beliefs.discard(belief)
+            if not beliefs:
+                del self.by_variable[var]
+                self._own_variables.discard(var)
+        if belief in self._component_of:
+            self._split(belief)
+
+    def retain(self, beliefs):
+        """Retracts every belief that is not in beliefs"""
+        for belief in [b for b in self.by_belief if b not in beliefs]:
+            self.retract(belief)
+
+    def clear(self):
+        self.by_belief.clear()
+        self.sources.clear()
+        self.by_variable.clear()
+        self._components.clear()
+        self._component_of.clear()
+        self._frozen.clear()
+        self._own_sources.clear()
+        self._own_variables.clear()
+        self._own_components.clear()
+
+    def copy(self):
+        """
+        Independent database with the same beliefs, the compiled clauses are shared and
+        so are the sets of beliefs, until one of the two databases changes them
+        """
+        other = ClauseDatabase(self.encoding)
+        other.by_belief = dict(self.by_belief)
+        other.sources = dict(self.sources)
+        other.by_variable = dict(self.by_variable)
+        other._components = dict(self._components)
+        other._component_of = dict(self._component_of)
+        # every set is shared now
+        self._own_sources = set()
+        self._own_variables = set()
+        self._own_components = set()
+        other._frozen = dict(self._frozen)
+        other._next_key = self._next_key
+        return other
+
+    def connected(self, seed_variables):
+        """Beliefs connected to the given variables through shared variables"""
+        beliefs = set()
+        seen = set(seed_variables)
+        stack = list(seen)
+        while stack:
+            for belief in self.by_variable.get(stack.pop(), ()):
+                if belief not in beliefs:
+                    beliefs.add(belief)
+                    for var in variables(self.by_belief[belief]):
+                        if var not in seen:
+                            seen.add(var)
+                            stack.append(var)
+        return beliefs
+
+    def components(self):
+        """Connected components of the beliefs (frozensets), each cached until it changes"""
+        frozen = self._frozen
+        for key, component in self._components.items():
+            if key not in frozen:
+                frozen[key] = frozenset(component)
+        return list(frozen.values())
+
+    def _new_component(self, beliefs):
+        key = self._next_key
+        self._next_key += 1
+        self._components[key] = beliefs
+        self._own_components.add(key)
+        for belief in beliefs:
+            self._component_of[belief] = key
+        return key
+
+    def _merge(self, belief, keys):
+        """Puts a new belief in one component with the components it shares variables with"""
+        if not keys:
+            self._new_component({belief})
+            return
+        target = max(keys, key=lambda key: len(self._components[key]))
+        component = _writable(self._components, self._own_components, target)
+        for key in keys - {target}:
+            for other in self._components.pop(key):
+                self._component_of[other] = target
+                component.add(other)
+            self._own_components.discard(key)
+            self._frozen.pop(key, None)
+        component.add(belief)
+        self._component_of[belief] = target
+        self._frozen.pop(target, None)
+
+    def _split(self, belief):
+        """Removes a retracted belief from its component, which may fall apart"""
+        key = self._component_of.pop(belief)
+        rest = set(self._components.pop(key))
+        self._own_components.discard(key)
+        rest.discard(belief)
+        self._frozen.pop(key, None)
+        while rest:
+            seed = next(iter(rest))
+            part = self.connected(variables(self.by_belief[seed])) | {seed}
+            rest -= part
+            self._new_component(part)
+
+    def clauses(self, beliefs=None):
+        """Clauses of the given beliefs, or of the whole database if beliefs is None"""
+        if beliefs is None:
+            return self.sources.keys()
+        clauses = set()
+        for belief in beliefs:
+            belief_clauses = self.by_belief.get(belief)
+            clauses.update(compile_formula(belief, self.encoding) if belief_clauses is None else belief_clauses)
+        return clauses
+
+
+def _writable(mapping, owned, key):
+    """The set at mapping[key] (a new one if there is none), copied first unless it is owned"""
+    value = mapping.get(key)
+    if value is None:
+        value = mapping[key] = set()
+    elif key not in owned:
+        value = mapping[key] = set(value)
+    owned.add(key)
+    return value
+
+
+def variables(clauses):
+    """Set of the variables of some clauses"""
+    return {abs(lit) for clause in clauses for lit in clause}
+
+
+def is_tautology(clause):
+    return any(-lit in clause for lit in clause)
+
+
+def resolve(c1, c2):
+    """
+    Resolve two clauses (c1, c2) and return the list of resolvents.
+    c1, c2: frozensets of signed integers.
+    """
+    resolvents = []
+    for lit in c1:
+        if -lit in c2:
+            # Remove the complementary literals and combine the rest
+            resolvents.append((c1 - {lit}) | (c2 - {-lit}))
+    return resolvents
@@ -0,0 +1,112 @@
+"""
+JSON line commands on a belief base, used by engine.py --batch and by the socket server.
+
+Every command is one JSON object with an "op" and its arguments; the reply is one JSON
+object that repeats the "id" of the command, if it has one:
+    {"op": "add", "formula": "p | q", "priority": "mid"}        -> {"ok": true}
+    {"op": "expand", "formula": "p"}                             -> {"ok": true}
+    {"op": "contract", "formula": "p", "mode": "kernel"}         -> {"ok": true}
+    {"op": "revise", "formula": "~p", "mode": "entrenchment"}    -> {"ok": true}
+    {"op": "entails", "formula": "q"}                            -> {"ok": true, "entails": true}
+    {"op": "entails", "formulas": ["q", "r"]}                    -> {"ok": true, "entails": [true, false]}
+    {"op": "dump"}                                               -> {"ok": true, "beliefs": [["p", 3], ...]}
+priority defaults to 'high' for expand and revise and to 'low' for add (as in engine.py),
+mode to 'partial_meet'. A failed command is answered with {"ok": false, "error": "..."}.
+With a budget on the belief base (see budget.py), "entails" is null for a query that ran
+out of it, and a contraction or revision that raises BudgetExceeded fails.
+"""
+import json
+import sys
+from contextlib import redirect_stdout
+from budget import BudgetExceeded
+
+READ_OPS = ('entails', 'dump')
+WRITE_OPS = ('add', 'expand', 'contract', 'revise')
+
+
+def parse_command(line):
+    """The command of a JSON line, ValueError if it is not a valid command"""
+    command = json.loads(line)
+    if not isinstance(command, dict):
+        raise ValueError("a command must be a JSON object")
+    op = command.get('op')
+    if op not in READ_OPS and op not in WRITE_OPS:
+        raise ValueError(f"Unknown op {op!r}, choose from: {', '.join(WRITE_OPS + READ_OPS)}")
+    if op != 'dump' and 'formula' not in command and not (op == 'entails' and 'formulas' in command):
+        raise ValueError(f"'{op}' needs a formula")
+    return command
+
+
+def reply(command, **data):
+    result = {'ok': True}
+    if isinstance(command, dict) and 'id' in command:
+        result['id'] = command['id']
+    result.update(data)
+    return result
+
+
+def error_reply(command, error):
+    result = reply(command, error=str(error))
+    result['ok'] = False
+    return result
+
+
+def queries(command):
+    """The formulas of an entails command, and whether a list was given"""
+    if 'formulas' in command:
+        return list(command['formulas']), True
+    return [command['formula']], False
+
+
+def dump(belief_base):
+    """The beliefs with their priority levels, in insertion order"""
+    store = belief_base.store
+    return [[formula, store.level(formula)] for formula in sorted(store.members, key=store.ids.get)]
+
+
+def execute(belief_base, command):
+    """Runs a parsed command on the belief base and returns its reply"""
+    op = command['op']
+    try:
+        if op == 'add':
+            belief_base.add_with_priority(command['formula'], command.get('priority', 'low'))
+        elif op == 'expand':
+            belief_base.expansion(command['formula'], command.get('priority', 'high'))
+        elif op == 'contract':
+            belief_base.contraction(command['formula'], command.get('mode', 'partial_meet'))
+        elif op == 'revise':
+            belief_base.revision(command['formula'], command.get('priority', 'high'),
+                                 command.get('mode', 'partial_meet'))
+        elif op == 'entails':
+            formulas, many = queries(command)
+            results = belief_base.entails_many(formulas)
+            return reply(command, entails=results if many else results[0])
+        else:
+            return reply(command, beliefs=dump(belief_base))
+    except (ValueError, KeyError, TypeError, BudgetExceeded) as e:
+        return error_reply(command, e)
+    return reply(command)
+
+
+def run_batch(belief_base, lines, out=sys.stdout):
+    """
+    Executes the JSON line commands of lines in order and writes one JSON reply per
+    command to out as soon as it is done. Blank lines are skipped. Messages printed by
+    the belief base go to stderr, so that out only holds replies.
+    Returns the number of failed commands.
+    """
+    failed = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            command = parse_command(line)
+        except ValueError as e:
+            result = error_reply(None, e)
+        else:
+            with redirect_stdout(sys.stderr):
+                result = execute(belief_base, command)
+        failed += not result['ok']
+        out.write(json.dumps(result) + '\n')
+        out.flush()
+    return failed
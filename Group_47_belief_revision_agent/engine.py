@@ -1,11 +1,30 @@
+import argparse
+import os
+import sys
 from beliefbase import BeliefBase
 from AGMpostulates import TestAGMPostulates
+from engines import ENGINES
+from loader import parse_input_with_optional_priority
+from formulas import ENCODINGS
+from commands import run_batch
+from server import serve
+from budget import Budget, ON_UNKNOWN
 
-def main():
-    belief_base = BeliefBase()
+def main(engine='resolution', load=None, snapshot=None, encoding='cnf', compiled=False, budget=None,
+         on_unknown='raise'):
+    options = dict(engine=engine, encoding=encoding, compiled=compiled, budget=budget, on_unknown=on_unknown)
+    if snapshot and os.path.exists(snapshot):
+        belief_base = BeliefBase.load(snapshot, **options)
+        print(f"Restored {len(belief_base.belief_base)} beliefs from {snapshot}")
+    else:
+        belief_base = BeliefBase(**options)
+    if load:
+        count = belief_base.load_beliefs(load)
+        print(f"Loaded {count} beliefs from {load}")
 
     print("=== Belief Revision Agent ===")
     print("\n symbols to be used: &, |, >>, <<, ~")
+    print(f" entailment engine: {engine}" + (" (queries answered from the compiled BDD)" if compiled else ""))
 
     while True:
         print("\nOptions:")
@@ -15,7 +34,9 @@ def main():
         print("4. Initialiaze with dummy data")
         print("5. Clear current belief base")
         print("6. Running all AGM postulates tests")
-        print("7. Quit")
+        print("7. Check entailment for a list of formulas")
+        print("8. Load beliefs from a file")
+        print("9. Quit")
 
         choice = input("Enter your choice (1/2/3): ").strip()
 
@@ -28,7 +49,9 @@ def main():
         elif choice == '2':
             user_input = input("Enter a logical formula (e.g., p | q, ~p, p >> q): ")
             entails = belief_base.resolution(belief_base.get_belief_base(), user_input)
-            if entails:
+            if entails is None:
+                print('\n', belief_base.belief_base, " ?|= ", user_input, "(unknown, out of budget)")
+            elif entails:
                 print('\n', belief_base.belief_base, " |= ", user_input)
             else:
                 print('\n', belief_base.belief_base, " !|= ", user_input)
@@ -50,24 +73,103 @@ def main():
             belief_base.clear()
 
         elif choice == '6':
-            postulates = TestAGMPostulates()
+            postulates = TestAGMPostulates(engine=engine)
             postulates.run_all_postulate_test()
 
         elif choice == '7':
+            user_input = input("Enter logical formulas separated by ';' (e.g., p; q | r; p >> q): ")
+            queries = [query.strip() for query in user_input.split(';') if query.strip()]
+            for query, entails in zip(queries, belief_base.entails_many(queries, stream=True)):
+                if entails is None:
+                    print(belief_base.belief_base, " ?|= ", query, "(unknown, out of budget)")
+                elif entails:
+                    print(belief_base.belief_base, " |= ", query)
+                else:
+                    print(belief_base.belief_base, " !|= ", query)
+
+        elif choice == '8':
+            path = input("Enter the path of a file with one 'formula [priority]' per line (or .jsonl): ").strip()
+            try:
+                count = belief_base.load_beliefs(path)
+                print(f"Loaded {count} beliefs from {path}")
+            except (OSError, ValueError) as e:
+                print(f"Could not load {path}: {e}")
+
+        elif choice == '9':
+            if snapshot:
+                belief_base.save(snapshot)
+                print(f"Saved the belief base to {snapshot}")
             print("Exiting. Goodbye!")
             break
 
         else:
             print("Invalid choice. Please try again.")
 
-def parse_input_with_optional_priority(user_input):
-    user_input = user_input.strip()
-    for priority in ("low", "mid", "high"):
-        if user_input.endswith(" " + priority):
-            formula = user_input[:-(len(priority)+1)].strip()
-            return formula, priority
-    return user_input, "low"
+def budget_of(args):
+    """The Budget of the --deadline, --max-clauses and --max-memory flags, None without them"""
+    if args.deadline is None and args.max_clauses is None and args.max_memory is None:
+        return None
+    return Budget(args.deadline, args.max_clauses, args.max_memory)
+
+def headless(args):
+    """--batch and --serve: no menu, and nothing but replies on stdout"""
+    options = dict(engine=args.engine, encoding=args.encoding, compiled=args.compiled,
+                   budget=budget_of(args), on_unknown=args.on_unknown)
+    if args.snapshot and os.path.exists(args.snapshot):
+        belief_base = BeliefBase.load(args.snapshot, **options)
+    else:
+        belief_base = BeliefBase(**options)
+    if args.load:
+        belief_base.load_beliefs(args.load)
+
+    if args.serve:
+        print(f"Serving the belief base on {args.serve}", file=sys.stderr)
+        serve(belief_base, args.serve, args.workers)
+        failed = 0
+    elif args.batch == '-':
+        failed = run_batch(belief_base, sys.stdin)
+    else:
+        with open(args.batch, encoding='utf-8') as f:
+            failed = run_batch(belief_base, f)
 
+    if args.snapshot:
+        belief_base.save(args.snapshot)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Belief Revision Agent")
+    parser.add_argument("--engine", choices=list(ENGINES), default="resolution",
+                        help="entailment engine used for all queries and contractions")
+    parser.add_argument("--encoding", choices=list(ENCODINGS), default="cnf",
+                        help="CNF encoding of the formulas, 'tseitin' keeps it linear in size")
+    parser.add_argument("--compiled", action="store_true",
+                        help="answer entailment queries from a BDD of the belief base")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="run the JSON line commands of FILE ('-' for stdin) without the menu "
+                             "and write one JSON reply per line to stdout (see commands.py)")
+    parser.add_argument("--serve", metavar="SOCKET",
+                        help="serve the belief base on a Unix socket instead of the menu (see server.py)")
+    parser.add_argument("--workers", type=int,
+                        help="processes deciding entailment queries for --serve")
+    parser.add_argument("--load", metavar="FILE",
+                        help="load beliefs from FILE ('-' for stdin) before starting, one "
+                             "'formula [priority]' per line, or JSON lines for *.jsonl")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="restore the compiled belief base from FILE at start if it exists, "
+                             "and save it there on quit")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="time budget of every entailment check, contraction and revision")
+    parser.add_argument("--max-clauses", type=int, metavar="N",
+                        help="clauses an engine may hold in one entailment check")
+    parser.add_argument("--max-memory", type=int, metavar="BYTES",
+                        help="estimated memory of these clauses")
+    parser.add_argument("--on-unknown", choices=list(ON_UNKNOWN), default="raise",
+                        help="how a contraction treats a check that ran out of budget")
+    args = parser.parse_args()
+    try:
+        budget = budget_of(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.batch or args.serve:
+        sys.exit(headless(args))
+    main(args.engine, args.load, args.snapshot, args.encoding, args.compiled, budget, args.on_unknown)
\ No newline at end of file
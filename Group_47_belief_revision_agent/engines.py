@@ -0,0 +1,178 @@
+import weakref
+from resolution import refute
+from cdcl import Solver
+from clauses import symbols
+from preprocess import preprocess, simplify
+
+
+class Session:
+    """
+    Many entailment questions against one fixed set of clauses.
+    is_unsatisfiable_with(clauses) decides whether the fixed clauses plus the given ones
+    (the negated query) are unsatisfiable, add(clauses) extends the fixed clauses.
+    This generic session simply asks the engine again every time; CDCLSession below
+    shares work between the questions.
+
+    Like is_unsatisfiable of the engines, it takes an optional stats dict that receives
+    the counters of the call; it is only passed when statistics are enabled. The same
+    holds for the budget (see budget.py): a check that runs out of it raises BudgetExceeded.
+    """
+    def __init__(self, engine, clauses):
+        self.engine = engine
+        self.clauses = list(clauses)
+
+    def add(self, clauses):
+        self.clauses.extend(clauses)
+
+    def is_unsatisfiable_with(self, clauses, stats=None, budget=None):
+        return decide(self.engine, self.clauses + list(clauses), stats, budget)
+
+
+class CDCLSession:
+    """
+    One incremental solver for all questions. The clauses of a question are guarded by a
+    fresh selector literal s (added as clause | ~s) and the solver is called under the
+    assumption s, so learnt clauses are kept from one question to the next. The selectors
+    are given back to the symbol table when the session is dropped.
+    """
+    def __init__(self, clauses):
+        self.solver = Solver(clauses)
+        self.selectors = []
+        weakref.finalize(self, symbols.release, self.selectors)
+
+    def add(self, clauses):
+        for clause in clauses:
+            self.solver.add_clause(clause)
+
+    def is_unsatisfiable_with(self, clauses, stats=None, budget=None):
+        selector = symbols.fresh()
+        self.selectors.append(selector)
+        for clause in clauses:
+            self.solver.add_clause(list(clause) + [-selector])
+        before = self.solver.counters()
+        try:
+            return not self.solver.solve([selector], budget)
+        finally:
+            if stats is not None:
+                stats.update({name: count - before[name] for name, count in self.solver.counters().items()})
+            # retire the selector, its clauses are satisfied from now on
+            self.solver.add_clause([-selector])
+
+
+class ResolutionEngine:
+    """
+    Entailment by resolution refutation (given-clause saturation). It has no session:
+    saturating a satisfiable base ahead of the queries costs far more than refuting each
+    query on the relevant part of the base (see BeliefBase.entails_many).
+    Preprocessing is on by default: the simplification decides most checks before the
+    saturation starts.
+    """
+    name = 'resolution'
+    preprocess = True
+
+    def is_unsatisfiable(self, clauses, stats=None, budget=None):
+        return refute(clauses, stats, budget)
+
+
+class CDCLEngine:
+    """
+    Entailment by a CDCL SAT solver: KB & ~query has no model. Preprocessing is off by
+    default, unit propagation and learning already do its work and it slows the solver down.
+    """
+    name = 'cdcl'
+    preprocess = False
+
+    def is_unsatisfiable(self, clauses, stats=None, budget=None):
+        solver = Solver(clauses)
+        try:
+            return not solver.solve(budget=budget)
+        finally:
+            if stats is not None:
+                stats.update(solver.counters())
+
+    def session(self, clauses):
+        return CDCLSession(clauses)
+
+
+class PreprocessingEngine:
+    """
+    Simplifies the clauses (see preprocess.py) before handing them to another engine;
+    most questions are decided by the simplification alone. The base of a session only
+    gets the equivalent simplification (preprocess.simplify), pure literals and variable
+    elimination are not sound when clauses are added afterwards.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = getattr(engine, 'name', type(engine).__name__)
+
+    def is_unsatisfiable(self, clauses, stats=None, budget=None):
+        decision, clauses = preprocess(clauses, stats, budget)
+        if decision is not None:
+            return decision
+        return decide(self.engine, clauses, stats, budget)
+
+    def session(self, clauses):
+        clauses = simplify(clauses)
+        if hasattr(self.engine, 'session'):
+            return self.engine.session(clauses)
+        return Session(self, clauses)
+
+
+ENGINES = {
+    ResolutionEngine.name: ResolutionEngine,
+    CDCLEngine.name: CDCLEngine,
+}
+
+
+def get_engine(engine, preprocess=False):
+    """
+    Returns an engine instance from its name, or the engine itself if an instance is given.
+    With preprocess, the engine is wrapped in a PreprocessingEngine; None uses the default
+    of the engine (its preprocess attribute: on for resolution, off for cdcl).
+    """
+    if isinstance(engine, str):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown entailment engine '{engine}', choose from: {', '.join(ENGINES)}")
+        engine = ENGINES[engine]()
+    if preprocess is None:
+        preprocess = getattr(engine, 'preprocess', False)
+    if preprocess and not isinstance(engine, PreprocessingEngine):
+        engine = PreprocessingEngine(engine)
+    return engine
+
+
+def decide(engine, clauses, stats=None, budget=None):
+    """
+    engine.is_unsatisfiable(clauses), passing stats and budget only when they are given,
+    so that engines without these parameters still work
+    """
+    options = {}
+    if stats is not None:
+        options['stats'] = stats
+    if budget is not None:
+        options['budget'] = budget
+    return engine.is_unsatisfiable(clauses, **options)
+
+
+def decide_with(session, clauses, stats=None, budget=None):
+    """session.is_unsatisfiable_with(clauses), with stats and budget only when they are given"""
+    options = {}
+    if stats is not None:
+        options['stats'] = stats
+    if budget is not None:
+        options['budget'] = budget
+    return session.is_unsatisfiable_with(clauses, **options)
+
+
+def has_session(engine):
+    """Whether the engine shares work between the questions of a session"""
+    if isinstance(engine, PreprocessingEngine):
+        engine = engine.engine
+    return hasattr(engine, 'session')
+
+
+def open_session(engine, clauses):
+    """Session of the engine on the given clauses, a generic one if the engine has none"""
+    if hasattr(engine, 'session'):
+        return engine.session(clauses)
+    return Session(engine, clauses)
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+
+class EntailmentCache:
+    """
+    Memo table of entailment results, keyed by (frozenset of belief ids, canonical query).
+
+    Besides exact hits it uses monotonicity: if a set of beliefs entails a query every
+    superset does, and if a set does not entail it no subset does. For every query only
+    the minimal entailing and the maximal non-entailing sets are kept for this check.
+    Both tables are LRU bounded.
+    """
+    def __init__(self, maxsize=4096, max_queries=256):
+        self.maxsize = maxsize
+        self.max_queries = max_queries
+        self.results = OrderedDict()   # (ids, query) -> bool
+        self.bounds = OrderedDict()    # query -> (minimal entailing sets, maximal non-entailing sets)
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, ids, query):
+        """Returns the cached result for the beliefs with the given ids, or None"""
+        key = (ids, query)
+        result = self.results.get(key)
+        if result is not None:
+            self.hits += 1
+            self.results.move_to_end(key)
+            return result
+
+        bounds = self.bounds.get(query)
+        if bounds is not None:
+            entailing, not_entailing = bounds
+            if any(subset <= ids for subset in entailing):
+                self.hits += 1
+                return True
+            if any(ids <= superset for superset in not_entailing):
+                self.hits += 1
+                return False
+
+        self.misses += 1
+        return None
+
+    def store(self, ids, query, result):
+        self.results[(ids, query)] = result
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+
+        bounds = self.bounds.get(query)
+        if bounds is None:
+            bounds = self.bounds[query] = ([], [])
+            if len(self.bounds) > self.max_queries:
+                self.bounds.popitem(last=False)
+        else:
+            self.bounds.move_to_end(query)
+
+        entailing, not_entailing = bounds
+        if result:
+            entailing[:] = [subset for subset in entailing if not ids <= subset]
+            entailing.append(ids)
+        else:
+            not_entailing[:] = [superset for superset in not_entailing if not superset <= ids]
+            not_entailing.append(ids)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.results), 'maxsize': self.maxsize}
+
+    def clear(self):
+        self.results.clear()
+        self.bounds.clear()
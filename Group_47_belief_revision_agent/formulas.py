@@ -0,0 +1,296 @@
+"""
+Native parser and CNF converter for the formula syntax of engine.py.
+
+    ~p        negation
+    p & q     conjunction
+    p | q     disjunction
+    p ^ q     exclusive or
+    p >> q    implication (p -> q)
+    p << q    reverse implication (q -> p)
+    True, False, and parentheses
+
+Precedence and associativity are those of Python (and so of sympify), from loosest to
+tightest: |, ^, &, >> and << (left associative), ~. Symbols are identifiers.
+
+The formula is parsed into a small tree and converted to the integer clause form used
+everywhere else (see clauses.py) without building any sympy expression. Two encodings:
+    - 'cnf': negations are pushed inwards and | is distributed over &. The clauses are
+      equivalent to the formula, but their number can grow exponentially.
+    - 'tseitin': Plaisted-Greenbaum definitional CNF. Every nested subformula gets a
+      fresh, nameless variable x with clauses for x -> subformula only, so the number of
+      clauses is linear in the size of the formula. The clauses are satisfiable exactly
+      when the formula is, and each compiled formula has its own variables, so entailment
+      (and therefore contraction and revision) is the same as with 'cnf'.
+"""
+import re
+
+TOKEN = re.compile(r'\s*(?:(>>|<<|[~&|^()])|([A-Za-z_][A-Za-z0-9_]*)|(\S))')
+CONSTANTS = {'True': True, 'False': False}
+
+# n-ary operators by precedence level, loosest first; ^ and the shifts are binary
+LEVELS = (('|', 'or'), ('^', 'xor'), ('&', 'and'))
+
+EMPTY = frozenset()
+ENCODINGS = ('cnf', 'tseitin')
+
+
+def tokenize(text):
+    tokens = []
+    for match in TOKEN.finditer(text):
+        operator, name, other = match.groups()
+        if other is not None:
+            raise ValueError(f"Unexpected character {other!r} in formula {text!r}")
+        if operator is not None:
+            tokens.append(operator)
+        elif name is not None:
+            tokens.append(name)
+    return tokens
+
+
+class Parser:
+    """
+    Recursive descent parser producing nested tuples:
+    ('var', id), ('const', bool), ('not', x), ('and' | 'or', [operands]), ('implies' | 'xor', a, b)
+    Symbol names are numbered by the given symbol table (see clauses.SymbolTable).
+    """
+    def __init__(self, text, symbols):
+        self.text = text
+        self.symbols = symbols
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError(f"Empty formula {self.text!r}")
+        node = self.binary(0)
+        if self.position < len(self.tokens):
+            self.error(f"unexpected {self.tokens[self.position]!r}")
+        return node
+
+    def error(self, message):
+        raise ValueError(f"Invalid formula {self.text!r}: {message}")
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def binary(self, level):
+        if level == len(LEVELS):
+            return self.shift()
+        operator, kind = LEVELS[level]
+        operands = [self.binary(level + 1)]
+        while self.peek() == operator:
+            self.position += 1
+            operands.append(self.binary(level + 1))
+        if len(operands) == 1:
+            return operands[0]
+        if kind == 'xor':
+            # a ^ b ^ c == (a ^ b) ^ c
+            node = operands[0]
+            for operand in operands[1:]:
+                node = ('xor', node, operand)
+            return node
+        return (kind, operands)
+
+    def shift(self):
+        node = self.unary()
+        while self.peek() in ('>>', '<<'):
+            operator = self.tokens[self.position]
+            self.position += 1
+            right = self.unary()
+            node = ('implies', node, right) if operator == '>>' else ('implies', right, node)
+        return node
+
+    def unary(self):
+        token = self.peek()
+        if token == '~':
+            # ~~~p is read iteratively, a long chain of negations does not recurse
+            negations = 0
+            while self.peek() == '~':
+                self.position += 1
+                negations += 1
+            node = self.atom()
+            return ('not', node) if negations % 2 else node
+        return self.atom()
+
+    def atom(self):
+        token = self.peek()
+        if token is None:
+            self.error("unexpected end")
+        self.position += 1
+        if token == '(':
+            node = self.binary(0)
+            if self.peek() != ')':
+                self.error("missing ')'")
+            self.position += 1
+            return node
+        if token in CONSTANTS:
+            return ('const', CONSTANTS[token])
+        if token[0].isalpha() or token[0] == '_':
+            return ('var', self.symbols.id(token))
+        self.error(f"unexpected {token!r}")
+
+
+def parse(text, symbols):
+    """Parses a formula string into a tree of tuples (see Parser)"""
+    return Parser(text, symbols).parse()
+
+
+def conjoin(clause_sets):
+    """Clauses of the conjunction of clause sets; {EMPTY} if one of them is a contradiction"""
+    result = set()
+    for clauses in clause_sets:
+        if EMPTY in clauses:
+            return {EMPTY}
+        result |= clauses
+    return result
+
+
+def disjoin(left, right):
+    """Clauses of the disjunction of two clause sets (distribution of | over &)"""
+    if not left or not right:
+        # one side is valid
+        return set()
+    result = set()
+    for c1 in left:
+        for c2 in right:
+            clause = c1 | c2
+            if not any(-lit in clause for lit in clause):
+                result.add(clause)
+    return result
+
+
+def cnf(node, positive=True):
+    """Set of clauses of node, or of its negation if positive is False"""
+    kind = node[0]
+    if kind == 'var':
+        return {frozenset((node[1] if positive else -node[1],))}
+    if kind == 'const':
+        return set() if node[1] == positive else {EMPTY}
+    if kind == 'not':
+        return cnf(node[1], not positive)
+    if kind == 'implies':
+        _, left, right = node
+        if positive:
+            return disjoin(cnf(left, False), cnf(right, True))
+        return conjoin((cnf(left, True), cnf(right, False)))
+    if kind == 'xor':
+        # a ^ b == (a | b) & (~a | ~b), ~(a ^ b) == (a | ~b) & (~a | b)
+        _, left, right = node
+        return conjoin((disjoin(cnf(left, True), cnf(right, positive)),
+                        disjoin(cnf(left, False), cnf(right, not positive))))
+
+    operands = node[1]
+    if (kind == 'and') == positive:
+        return conjoin(cnf(operand, positive) for operand in operands)
+    result = None
+    for operand in operands:
+        clauses = cnf(operand, positive)
+        result = clauses if result is None else disjoin(result, clauses)
+        if not result:
+            break
+    return result
+
+
+def view(node, positive):
+    """
+    node (or its negation) seen as ('and' | 'or', [(child, positive)]), ('lit', literal)
+    or ('const', bool), with the negations pushed one level down
+    """
+    while node[0] == 'not':
+        node, positive = node[1], not positive
+    kind = node[0]
+    if kind == 'var':
+        return 'lit', node[1] if positive else -node[1]
+    if kind == 'const':
+        return 'const', node[1] == positive
+    if kind == 'implies':
+        _, left, right = node
+        if positive:
+            return 'or', [(left, False), (right, True)]
+        return 'and', [(left, True), (right, False)]
+    if kind == 'xor':
+        _, left, right = node
+        if positive:
+            return 'and', [(('or', [left, right]), True), (('or', [('not', left), ('not', right)]), True)]
+        return 'and', [(('or', [left, ('not', right)]), True), (('or', [('not', left), right]), True)]
+    if (kind == 'and') == positive:
+        return 'and', [(operand, positive) for operand in node[1]]
+    return 'or', [(operand, positive) for operand in node[1]]
+
+
+class Definitions:
+    """Plaisted-Greenbaum encoding of one formula, the definitions are collected in clauses"""
+    def __init__(self, symbols):
+        self.symbols = symbols
+        self.clauses = set()
+
+    def top(self, node, positive):
+        """Adds the clauses of node; the conjunctions and the outer disjunction need no variable"""
+        kind, value = view(node, positive)
+        if kind == 'lit':
+            self.clauses.add(frozenset((value,)))
+        elif kind == 'const':
+            if not value:
+                self.clauses.add(EMPTY)
+        elif kind == 'and':
+            for child, child_positive in value:
+                self.top(child, child_positive)
+        else:
+            clause = self.disjunction(value)
+            if clause is not None:
+                self.clauses.add(clause)
+
+    def disjunction(self, children):
+        """Clause of the literals of the disjuncts, nested disjunctions flattened; None if valid"""
+        literals = set()
+        stack = list(children)
+        while stack:
+            kind, value = view(*stack.pop())
+            if kind == 'or':
+                stack.extend(value)
+            elif kind == 'const':
+                if value:
+                    return None
+            else:
+                literals.add(value if kind == 'lit' else self.define(value))
+        if any(-lit in literals for lit in literals):
+            return None
+        return frozenset(literals)
+
+    def define(self, children):
+        """Fresh variable x of a conjunction, with a clause x -> child for every conjunct"""
+        x = self.symbols.fresh()
+        stack = list(children)
+        while stack:
+            kind, value = view(*stack.pop())
+            if kind == 'and':
+                stack.extend(value)
+            elif kind == 'lit':
+                self.clauses.add(frozenset((-x, value)))
+            elif kind == 'const':
+                if not value:
+                    self.clauses.add(frozenset((-x,)))
+            else:
+                clause = self.disjunction(value)
+                if clause is not None:
+                    self.clauses.add(clause | {-x})
+        return x
+
+
+def compile_text(text, symbols, negate=False, encoding='cnf'):
+    """
+    Tuple of the integer clauses of a formula string, or of its negation.
+    The parser and the encoders recurse on the nesting of the formula: ValueError if it is
+    deeper than the interpreter allows.
+    """
+    try:
+        node = parse(text, symbols)
+        if encoding == 'tseitin':
+            definitions = Definitions(symbols)
+            definitions.top(node, not negate)
+            if EMPTY in definitions.clauses:
+                return (EMPTY,)
+            return tuple(definitions.clauses)
+        return tuple(cnf(node, not negate))
+    except RecursionError:
+        raise ValueError("formula nested too deeply") from None
@@ -0,0 +1,80 @@
+"""
+Streaming input of beliefs from files or stdin.
+
+Two formats are read:
+    - lines: one "formula [priority]" per line, as typed in engine.py; blank lines and
+      lines starting with '#' are skipped.
+    - jsonl: one JSON value per line, either a formula string, a [formula, priority] pair
+      or an object {"formula": ..., "priority": ...}.
+The priority is 'low', 'mid', 'high' or a numeric level, and defaults to 'low'.
+"""
+import json
+import sys
+from itertools import islice
+
+from store import priority_level, NUMBER
+
+
+def parse_input_with_optional_priority(user_input):
+    user_input = user_input.strip()
+    for priority in ("low", "mid", "high"):
+        if user_input.endswith(" " + priority):
+            formula = user_input[:-(len(priority)+1)].strip()
+            return formula, priority
+
+    # a numeric level, e.g. 'p | q 5' or 'p | q 2.5'
+    formula, _, level = user_input.rpartition(" ")
+    if formula and NUMBER.fullmatch(level):
+        return formula.strip(), priority_level(level)
+    return user_input, "low"
+
+
+def parse_json_belief(line):
+    value = json.loads(line)
+    if isinstance(value, str):
+        return value, "low"
+    if isinstance(value, list):
+        formula, priority = value if len(value) == 2 else (value[0], "low")
+        return formula, priority
+    return value["formula"], value.get("priority", "low")
+
+
+def read_beliefs(source, format=None):
+    """
+    Yields (formula, priority) pairs from a path, '-' for stdin, or an open text file.
+    format is 'lines' or 'jsonl'; by default it is 'jsonl' for *.jsonl paths, else 'lines'.
+    """
+    if format is None:
+        format = 'jsonl' if isinstance(source, str) and source.endswith('.jsonl') else 'lines'
+    if format not in ('lines', 'jsonl'):
+        raise ValueError(f"Unknown belief file format '{format}', choose 'lines' or 'jsonl'")
+    parse = parse_json_belief if format == 'jsonl' else parse_input_with_optional_priority
+
+    if source == '-':
+        yield from _read(sys.stdin, parse, format)
+    elif isinstance(source, str):
+        with open(source, encoding='utf-8') as f:
+            yield from _read(f, parse, format)
+    else:
+        yield from _read(source, parse, format)
+
+
+def _read(lines, parse, format):
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or (format == 'lines' and line.startswith('#')):
+            continue
+        try:
+            yield parse(line)
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Invalid belief on line {number}: {line!r} ({e})") from e
+
+
+def chunks(iterable, size):
+    """Splits an iterable in lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
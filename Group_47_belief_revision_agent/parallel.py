@@ -0,0 +1,101 @@
+"""
+Parallel entailment checks for the subset enumeration of the remainder set.
+
+Workers receive the clauses of every belief as tuples of integers, with lists of belief
+indices to check; no sympy objects cross the process boundary.
+is_unsatisfiable is a standalone task for any process pool (see server.py).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from budget import BudgetExceeded
+from engines import decide
+
+# state of a worker process: the problem of the last task it received, by id
+_problem_id = None
+_engine = None
+_belief_clauses = None
+_query_clauses = None
+_budget = None
+
+
+def _load_problem(problem_id, problem):
+    global _problem_id, _engine, _belief_clauses, _query_clauses, _budget
+    engine, belief_clauses, query_clauses, budget = problem
+    _problem_id = problem_id
+    _engine = engine
+    _budget = budget
+    _belief_clauses = [[frozenset(clause) for clause in clauses] for clauses in belief_clauses]
+    _query_clauses = [frozenset(clause) for clause in query_clauses]
+
+
+def _check_subsets(problem_id, problem, subsets):
+    """
+    For every subset (tuple of belief indices), True if it entails the query, or the
+    BudgetExceeded of a check that ran out of budget
+    """
+    if problem_id != _problem_id:
+        _load_problem(problem_id, problem)
+    results = []
+    for subset in subsets:
+        clauses = [clause for i in subset for clause in _belief_clauses[i]]
+        clauses.extend(_query_clauses)
+        try:
+            results.append(decide(_engine, clauses, budget=_budget))
+        except BudgetExceeded as e:
+            results.append(e)
+    return results
+
+
+def is_unsatisfiable(engine, clauses, budget=None):
+    """
+    Task for a process pool: engine decision on clauses given as tuples of integers,
+    None (unknown) if it runs out of budget
+    """
+    try:
+        return decide(engine, [frozenset(clause) for clause in clauses], budget=budget)
+    except BudgetExceeded:
+        return None
+
+
+class SubsetChecker:
+    """
+    Process pool deciding whether subsets of a list of beliefs entail a query. A belief
+    base keeps one for all its contractions: set_problem() gives the beliefs and query of
+    a contraction, entails_each() checks subsets of them. Every task carries the problem
+    (a few tuples of integers), a worker only converts it when it changes.
+    The budget of a problem is the started limits of the contraction (see budget.py); its
+    deadline is a time.monotonic value, which all processes of a machine share on Linux.
+    """
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.problem_id = 0
+        self.problem = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def set_problem(self, engine, belief_clauses, query_clauses, budget=None):
+        self.problem_id += 1
+        self.problem = (
+            engine,
+            [[tuple(clause) for clause in clauses] for clauses in belief_clauses],
+            [tuple(clause) for clause in query_clauses],
+            budget,
+        )
+
+    def entails_each(self, subsets):
+        """Returns a list with, for every subset, True if it entails the query (see _check_subsets)"""
+        # a few chunks per worker keeps them busy without sending one task per subset
+        chunk_size = max(1, len(subsets) // (4 * self.workers))
+        chunks = [subsets[i:i + chunk_size] for i in range(0, len(subsets), chunk_size)]
+        results = []
+        for chunk_results in self.executor.map(_check_subsets, [self.problem_id] * len(chunks),
+                                                [self.problem] * len(chunks), chunks):
+            results.extend(chunk_results)
+        return results
@@ -0,0 +1,194 @@
+"""
+Simplification of a clause set before it is handed to an entailment engine.
+
+Every step keeps the set satisfiable exactly when it was, which is all a refutation needs:
+    - tautologies and duplicate clauses are dropped
+    - unit propagation to a fixpoint: a unit clause l removes the clauses containing l
+      and the literal ~l from the others
+    - pure literals: the clauses of a literal whose complement never occurs are dropped
+    - subsumption: a clause that contains another clause is dropped
+    - bounded variable elimination: a variable v is resolved away when its occurrences
+      are few and the non-tautological resolvents are not more than the clauses of v
+The steps are repeated until nothing changes. The empty clause decides unsatisfiable, an
+empty clause set decides satisfiable; otherwise the remaining clauses go to the engine.
+
+Pure literals and variable elimination are not sound for a clause set that grows later,
+such as the base of an engine session. simplify() only applies the steps that keep the set
+equivalent: tautologies, duplicates, subsumption, and unit propagation that keeps the units.
+"""
+# bounded variable elimination only tries variables with at most this many clauses
+MAX_ELIMINATION_OCCURRENCES = 10
+
+
+class Preprocessor:
+    def __init__(self, clauses):
+        self.clauses = set()
+        self.occurs = {}   # literal -> clauses containing it
+        self.refuted = False
+        self.assigned = []  # literals of the propagated unit clauses
+        self.units = 0
+        self.pure = 0
+        self.subsumed = 0
+        self.eliminated = 0
+        for clause in clauses:
+            clause = frozenset(clause)
+            if not any(-lit in clause for lit in clause):
+                self.add(clause)
+
+    def add(self, clause):
+        if not clause:
+            self.refuted = True
+        if clause in self.clauses:
+            return
+        self.clauses.add(clause)
+        for lit in clause:
+            self.occurs.setdefault(lit, set()).add(clause)
+
+    def remove(self, clause):
+        self.clauses.discard(clause)
+        for lit in clause:
+            clauses = self.occurs[lit]
+            clauses.discard(clause)
+            if not clauses:
+                del self.occurs[lit]
+
+    def counters(self):
+        return {'units': self.units, 'pure': self.pure, 'subsumed': self.subsumed,
+                'eliminated': self.eliminated}
+
+    def run(self, budget=None):
+        """
+        Simplifies to a fixpoint; returns True (unsatisfiable), False (satisfiable) or None.
+        budget: optional limits (see budget.py), only the deadline is checked between steps.
+        """
+        # the cheap steps first, variable elimination only once they are stuck
+        steps = (self.propagate_units, self.eliminate_pure, self.eliminate_subsumed, self.eliminate_variables)
+        changed = True
+        while changed and not self.refuted:
+            changed = False
+            for step in steps:
+                if budget is not None:
+                    budget.check()
+                if step():
+                    changed = True
+                    break
+                if self.refuted:
+                    break
+        if self.refuted:
+            return True
+        if not self.clauses:
+            return False
+        return None
+
+    def propagate_units(self):
+        pending = [clause for clause in self.clauses if len(clause) == 1]
+        changed = False
+        while pending and not self.refuted:
+            unit = pending.pop()
+            if unit not in self.clauses:
+                continue
+            (lit,) = unit
+            self.assigned.append(lit)
+            self.units += 1
+            changed = True
+            for clause in list(self.occurs.get(lit, ())):
+                self.remove(clause)
+            for clause in list(self.occurs.get(-lit, ())):
+                self.remove(clause)
+                shortened = clause - {-lit}
+                self.add(shortened)
+                if len(shortened) == 1:
+                    pending.append(shortened)
+        return changed
+
+    def simplify(self):
+        """Units and subsumption only, keeping the unit clauses: the result is equivalent"""
+        self.propagate_units()
+        if self.refuted:
+            return
+        for lit in self.assigned:
+            self.add(frozenset([lit]))
+        self.eliminate_subsumed()
+
+    def eliminate_pure(self):
+        changed = False
+        for lit in sorted(self.occurs, key=abs):
+            if lit in self.occurs and -lit not in self.occurs:
+                self.pure += 1
+                changed = True
+                for clause in list(self.occurs[lit]):
+                    self.remove(clause)
+        return changed
+
+    def eliminate_subsumed(self):
+        changed = False
+        for clause in sorted(self.clauses, key=len):
+            if clause not in self.clauses:
+                continue
+            rarest = min(clause, key=lambda lit: len(self.occurs[lit]))
+            for other in list(self.occurs[rarest]):
+                if other is not clause and clause < other:
+                    self.remove(other)
+                    self.subsumed += 1
+                    changed = True
+        return changed
+
+    def eliminate_variables(self):
+        changed = False
+        for var in sorted({abs(lit) for lit in self.occurs}):
+            positive, negative = self.occurs.get(var, ()), self.occurs.get(-var, ())
+            if not positive or not negative or len(positive) + len(negative) > MAX_ELIMINATION_OCCURRENCES:
+                continue
+            resolvents = set()
+            for p in positive:
+                for n in negative:
+                    resolvent = (p - {var}) | (n - {-var})
+                    if not any(-lit in resolvent for lit in resolvent):
+                        resolvents.add(resolvent)
+            if len(resolvents) > len(positive) + len(negative):
+                continue
+            for clause in list(positive) + list(negative):
+                self.remove(clause)
+            for resolvent in resolvents:
+                self.add(resolvent)
+            self.eliminated += 1
+            changed = True
+            if self.refuted:
+                break
+        return changed
+
+
+def preprocess(clauses, stats=None, budget=None):
+    """
+    Simplifies a clause set. Returns (decision, clauses): decision is True if the set is
+    unsatisfiable, False if it is satisfiable and None if the remaining clauses (a list)
+    still have to be decided. stats: optional dict that receives the counters, with the
+    number of clauses before and after. budget: see Preprocessor.run.
+    """
+    clauses = list(clauses)
+    preprocessor = Preprocessor(clauses)
+    decision = preprocessor.run(budget)
+    if stats is not None:
+        stats.update({'preprocess_' + name: count for name, count in preprocessor.counters().items()})
+        stats['preprocess_clauses_in'] = len(clauses)
+        stats['preprocess_clauses_out'] = len(preprocessor.clauses)
+        stats['preprocess_decided'] = int(decision is not None)
+    return decision, list(preprocessor.clauses)
+
+
+def simplify(clauses, stats=None):
+    """
+    Equivalent simplification of a clause set that may still grow, e.g. the base of an
+    engine session. Returns the clauses, [frozenset()] if they are unsatisfiable.
+    stats: optional dict that receives the counters, as in preprocess.
+    """
+    clauses = list(clauses)
+    preprocessor = Preprocessor(clauses)
+    preprocessor.simplify()
+    if stats is not None:
+        stats.update({'preprocess_' + name: count for name, count in preprocessor.counters().items()})
+        stats['preprocess_clauses_in'] = len(clauses)
+        stats['preprocess_clauses_out'] = len(preprocessor.clauses)
+    if preprocessor.refuted:
+        return [frozenset()]
+    return list(preprocessor.clauses)
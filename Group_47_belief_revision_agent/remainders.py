@@ -0,0 +1,118 @@
+"""
+Remainder sets through kernels and minimal hitting sets.
+
+A kernel of A wrt. ϕ is an inclusion-minimal subset of A that entails ϕ, a remainder
+(element of A⊥ϕ) is an inclusion-maximal subset of A that does not entail ϕ.
+A subset does not entail ϕ iff it misses at least one belief of every kernel, so the
+remainders are exactly the complements of the minimal hitting sets of the kernels.
+The cost depends on the number of kernels instead of the 2^n subsets of A.
+
+The enumeration can be bounded by an expired() callable (see BeliefBase._expired): None
+while there is time left, then the answer taken for every further check, at which point
+the enumeration stops (see _stop).
+"""
+
+
+def find_kernel(beliefs, entails, expired=None):
+    """
+    Shrinks a set of beliefs that entails ϕ to a kernel by dropping beliefs one at a
+    time and keeping them out whenever the rest still entails ϕ. Once expired, the
+    beliefs not tried yet are kept: the result contains a kernel.
+    """
+    kernel = set(beliefs)
+    for belief in list(kernel):
+        if expired is not None and expired() is not None:
+            break
+        kernel.discard(belief)
+        if not entails(kernel):
+            kernel.add(belief)
+    return kernel
+
+
+def add_hitting_set(hitting_sets, new_set):
+    """
+    Updates the minimal hitting sets of a family with one more set (Berge's algorithm).
+    hitting_sets: list of frozensets, the minimal hitting sets before new_set was added.
+    """
+    kept = [h for h in hitting_sets if h & new_set]
+    missed = [h for h in hitting_sets if not h & new_set]
+
+    # An extension h | {belief} is minimal unless it contains a kept set k. Such a k meets
+    # new_set in belief alone and the rest of k is a subset of h: the rests are indexed by
+    # belief and by one element of theirs (any element of a subset of h is in h).
+    rests = {belief: {} for belief in new_set}
+    covered = set()  # beliefs whose extensions are all covered by a kept set {belief}
+    for k in kept:
+        common = k & new_set
+        if len(common) != 1:
+            continue
+        (belief,) = common
+        rest = k - common
+        if not rest:
+            covered.add(belief)
+        else:
+            rests[belief].setdefault(next(iter(rest)), []).append(rest)
+
+    extended = []
+    for belief in new_set:
+        if belief in covered:
+            continue
+        index = rests[belief]
+        for h in missed:
+            if not any(rest <= h for element in h for rest in index.get(element, ())):
+                extended.append(h | {belief})
+    return kept + extended
+
+
+def compute_kernels(beliefs, entails, expired=None):
+    """
+    Returns (kernels, remainders) of beliefs wrt. the query decided by entails(subset).
+    expired: optional callable bounding the enumeration, checked before every check of a
+    hitting set, every kernel search and every update of the hitting sets.
+    """
+    beliefs = frozenset(beliefs)
+    kernels = []
+    hitting_sets = [frozenset()]
+    verified = set()   # hitting sets whose complement is known not to entail ϕ
+    entailing = set()  # hitting sets whose complement is known to entail ϕ
+
+    def out_of_time():
+        return None if expired is None else expired()
+
+    while True:
+        for h in hitting_sets:
+            if h in verified:
+                continue
+            answer = out_of_time()
+            if answer is not None:
+                return _stop(beliefs, kernels, hitting_sets, verified, entailing, answer)
+            candidate = beliefs - h
+            if not entails(candidate):
+                verified.add(h)
+                continue
+            # the complement still entails ϕ: it contains a kernel we have not seen yet
+            entailing.add(h)
+            kernel = frozenset(find_kernel(candidate, entails, expired))
+            kernels.append(kernel)
+            answer = out_of_time()
+            if answer is not None:
+                return _stop(beliefs, kernels, hitting_sets, verified, entailing, answer)
+            hitting_sets = add_hitting_set(hitting_sets, kernel)
+            break
+        else:
+            return kernels, [set(beliefs - h) for h in hitting_sets]
+
+
+def _stop(beliefs, kernels, hitting_sets, verified, entailing, answer):
+    """
+    (kernels, remainders) when the enumeration runs out of time, answer being taken for
+    the complements of the hitting sets not checked yet:
+        - True: they entail ϕ, so they count as kernels (there is no time left to shrink
+          them) and are no remainders; the empty set is left if no remainder is known
+        - False: they do not entail ϕ and are remainders, next to the checked ones
+    """
+    if answer:
+        kernels = kernels + [beliefs - h for h in hitting_sets if h not in verified and h not in entailing]
+        remainders = [set(beliefs - h) for h in hitting_sets if h in verified]
+        return kernels, remainders or [set()]
+    return kernels, [set(beliefs - h) for h in hitting_sets if h not in entailing]
@@ -0,0 +1,157 @@
+import heapq
+from clauses import is_tautology, resolve
+from budget import clause_size
+
+
+class Saturation:
+    """
+    Resolution with a given-clause loop.
+
+    Clauses wait in the unprocessed queue (shortest first) and are resolved only
+    against the processed ones, so every pair is resolved at most once.
+    Tautologies are dropped, a clause subsumed by a processed clause is discarded
+    (forward subsumption) and a new processed clause removes the processed clauses
+    it subsumes (backward subsumption).
+
+    The processed clauses are indexed by literal, so a given clause is only paired with
+    the clauses that contain the complement of one of its literals, and subsumption only
+    looks at clauses sharing a literal with it. Unit clauses are propagated eagerly: the
+    literals they falsify are removed from a given clause before it is processed, and a
+    new unit clause replaces the processed clauses containing its complement by their
+    shortened resolvents.
+
+    run() takes an optional budget (see budget.py), checked before every given clause
+    against the clauses seen so far; when it raises BudgetExceeded the state is left
+    consistent, and run() can be called again to continue.
+    """
+    def __init__(self, clauses=()):
+        self.processed = set()
+        self.occurs = {}       # literal -> processed clauses containing it
+        self.units = set()     # literals of the processed unit clauses
+        self.unprocessed = []
+        self.seen = set()
+        self.memory = 0        # estimated bytes of the seen clauses
+        self.refuted = False
+        # counters
+        self.rounds = 0        # given clauses taken from the queue
+        self.pairs = 0         # pairs of clauses resolved
+        self.resolvents = 0    # resolvents generated
+        self.duplicates = 0    # clauses rejected as already seen or tautological
+        self.subsumed = 0      # clauses removed by forward or backward subsumption
+        self.propagated = 0    # clauses shortened by unit clauses
+        for clause in clauses:
+            self.add(clause)
+
+    def counters(self):
+        return {'rounds': self.rounds, 'pairs': self.pairs, 'resolvents': self.resolvents,
+                'duplicates': self.duplicates, 'subsumed': self.subsumed,
+                'propagated': self.propagated}
+
+    def add(self, clause):
+        if clause in self.seen or is_tautology(clause):
+            self.duplicates += 1
+            return
+        self.seen.add(clause)
+        self.memory += clause_size(clause)
+        heapq.heappush(self.unprocessed, (len(clause), len(self.seen), clause))
+
+    def _insert(self, clause):
+        self.processed.add(clause)
+        for lit in clause:
+            self.occurs.setdefault(lit, set()).add(clause)
+        if len(clause) == 1:
+            self.units.update(clause)
+
+    def _remove(self, clause):
+        self.processed.discard(clause)
+        for lit in clause:
+            clauses = self.occurs[lit]
+            clauses.discard(clause)
+            if not clauses:
+                del self.occurs[lit]
+        if len(clause) == 1:
+            self.units.difference_update(clause)
+
+    def _is_subsumed(self, clause):
+        """Returns True if a processed clause is a subset of clause"""
+        for lit in clause:
+            if lit in self.units:
+                return True
+            for other in self.occurs.get(lit, ()):
+                if other <= clause:
+                    return True
+        return False
+
+    def _subsumed_by(self, clause):
+        """Processed clauses that are supersets of clause, from its rarest literal"""
+        rarest = min((self.occurs.get(lit, ()) for lit in clause), key=len)
+        return [other for other in rarest if clause <= other]
+
+    def run(self, budget=None):
+        """Saturates the clause set, returns True if the empty clause is derived."""
+        while self.unprocessed and not self.refuted:
+            if budget is not None:
+                budget.check(len(self.seen), self.memory)
+            _, _, given = heapq.heappop(self.unprocessed)
+            self.rounds += 1
+            if not given:
+                self.refuted = True
+                break
+
+            # forward subsumption
+            if self._is_subsumed(given):
+                self.subsumed += 1
+                continue
+
+            # unit propagation: the shortened clause subsumes the given one
+            if any(-lit in self.units for lit in given):
+                self.propagated += 1
+                shortened = frozenset(lit for lit in given if -lit not in self.units)
+                if not shortened:
+                    self.refuted = True
+                    return True
+                self.add(shortened)
+                continue
+
+            # backward subsumption
+            for other in self._subsumed_by(given):
+                self._remove(other)
+                self.subsumed += 1
+
+            # only the clauses with a complementary literal can be resolved against given
+            candidates = set()
+            for lit in given:
+                candidates.update(self.occurs.get(-lit, ()))
+            self.pairs += len(candidates)
+            for other in candidates:
+                for resolvent in resolve(given, other):
+                    self.resolvents += 1
+                    # two clauses resolve to yield the empty clause
+                    if not resolvent:
+                        self.refuted = True
+                        return True
+                    self.add(resolvent)
+
+            if len(given) == 1:
+                # every candidate was just shortened by the unit, its resolvent subsumes it
+                for other in candidates:
+                    self._remove(other)
+                self.propagated += len(candidates)
+            self._insert(given)
+
+        # saturated without deriving the empty clause, unless refuted
+        return self.refuted
+
+
+def refute(clauses, stats=None, budget=None):
+    """
+    Resolution refutation, returns True if the clause set is unsatisfiable.
+    stats: optional dict that receives the counters of the saturation, also when the
+    budget (optional, see budget.py) runs out.
+    """
+    saturation = Saturation(clauses)
+    try:
+        return saturation.run(budget)
+    finally:
+        if stats is not None:
+            stats.update(saturation.counters())
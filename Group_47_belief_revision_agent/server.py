@@ -0,0 +1,228 @@
+"""
+Unix socket server for a belief base, speaking the JSON line commands of commands.py.
+
+Clients send one command per line and get one reply per line, in order, on the same
+connection; many clients can be connected at once.
+    - Mutations (add, expand, contract, revise) run one at a time on the belief base, in a
+      thread of their own so that reads go on meanwhile. When one completes, an immutable
+      fork of the base (see BeliefBase.fork) is published.
+    - Reads (entails, dump) are answered from the latest published fork, so they never see
+      a half-done change. Entailment checks that are not in the entailment cache are sent
+      to a process pool, the event loop only parses queries. A check only gets the clauses
+      of the beliefs that share symbols with the query, as in BeliefBase.resolution; the
+      consistency of the other components is decided once per component in the pool.
+      With a budget on the belief base, every check gets its own, and a query that runs
+      out of it is answered null (unknown).
+    - In compiled mode, the mutation thread builds the BDD of the base before publishing the
+      fork, which shares it; the queries traverse it in threads, off the event loop.
+
+BeliefClient is a small blocking client, e.g. for scripts and tests.
+"""
+import asyncio
+import json
+import os
+import signal
+import socket
+import stat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from budget import BudgetExceeded
+from clauses import compile_negation, variables
+from commands import parse_command, execute, reply, error_reply, queries, dump, READ_OPS
+from parallel import is_unsatisfiable
+
+
+class BeliefServer:
+    def __init__(self, belief_base, workers=None):
+        self.belief_base = belief_base
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.mutator = ThreadPoolExecutor(max_workers=1)
+        self._mutation_lock = None   # asyncio.Lock, created in the event loop
+        self._consistency = {}       # component -> future of is_unsatisfiable, see _consistent
+        self._publish(self._fork())
+
+    def _publish(self, snapshot):
+        """Publishes a fork of the belief base for the reads"""
+        self.snapshot = snapshot
+        # the results of the components that did not change stay valid
+        components = set(snapshot.clause_db.components())
+        self._consistency = {component: future for component, future in self._consistency.items()
+                             if component in components}
+
+    def _mutate(self, command):
+        """Runs in the mutation thread: the reply, and the fork to publish if the base changed"""
+        result = execute(self.belief_base, command)
+        return result, self._fork() if result['ok'] else None
+
+    def _fork(self):
+        """Fork of the belief base to publish, with its BDD built first in compiled mode"""
+        base = self.belief_base
+        if base.compiled:
+            try:
+                base.compiled_base(base.budget.start() if base.budget is not None else None)
+            except BudgetExceeded:
+                # the queries continue the compilation under their own budgets
+                pass
+        return base.fork()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                result = await self.execute_line(line)
+                writer.write(json.dumps(result).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def execute_line(self, line):
+        try:
+            command = parse_command(line)
+        except ValueError as e:
+            return error_reply(None, e)
+
+        if command['op'] == 'entails':
+            return await self.entails(command)
+        if command['op'] in READ_OPS:
+            return reply(command, beliefs=dump(self.snapshot))
+
+        # one mutation at a time, each one published before the next starts
+        if self._mutation_lock is None:
+            self._mutation_lock = asyncio.Lock()
+        async with self._mutation_lock:
+            loop = asyncio.get_running_loop()
+            result, snapshot = await loop.run_in_executor(self.mutator, self._mutate, command)
+            if snapshot is not None:
+                self._publish(snapshot)
+        return result
+
+    async def entails(self, command):
+        snapshot = self.snapshot
+        try:
+            formulas, many = queries(command)
+            results = await asyncio.gather(*(self._entails(snapshot, formula) for formula in formulas))
+        except (ValueError, KeyError, TypeError) as e:
+            return error_reply(command, e)
+        return reply(command, entails=results if many else results[0])
+
+    async def _entails(self, snapshot, formula):
+        if snapshot.compiled:
+            # a traversal of the compiled BDD is cheaper than sending the clauses away
+            budget = snapshot.budget.start() if snapshot.budget is not None else None
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(None, snapshot._compiled_entails, formula, budget)
+            except BudgetExceeded:
+                return None
+
+        negated_query = compile_negation(formula, snapshot.encoding)
+        cache = snapshot.entailment_cache
+        if cache is not None:
+            ids = frozenset(snapshot._belief_id(belief) for belief in snapshot.belief_base)
+            query_key = frozenset(negated_query)
+            cached = cache.lookup(ids, query_key)
+            if cached is not None:
+                return cached
+
+        clauses = await self._relevant_clauses(snapshot, negated_query)
+        if clauses is None:
+            # an inconsistent belief base entails everything
+            entails = True
+        else:
+            entails = await self._run(snapshot, clauses + [tuple(clause) for clause in negated_query])
+        if cache is not None and entails is not None:
+            cache.store(ids, query_key, entails)
+        return entails
+
+    async def _relevant_clauses(self, snapshot, negated_query):
+        """
+        Clauses of the beliefs connected to the query, all the clauses if the consistency of
+        another component is unknown, None if another component is inconsistent
+        """
+        clause_db = snapshot.clause_db
+        relevant = clause_db.connected(variables(negated_query))
+        if len(relevant) < len(clause_db):
+            others = [component for component in clause_db.components() if component.isdisjoint(relevant)]
+            inconsistent = await asyncio.gather(*(self._consistent(snapshot, component) for component in others))
+            if any(inconsistent):
+                return None
+            if None in inconsistent:
+                relevant = None
+        return [tuple(clause) for clause in clause_db.clauses(relevant)]
+
+    def _consistent(self, snapshot, component):
+        """Future of is_unsatisfiable on the clauses of a component, started once per component"""
+        future = self._consistency.get(component)
+        if future is None or future.done() and (future.exception() is not None or future.result() is None):
+            clauses = [tuple(clause) for clause in snapshot.clause_db.clauses(component)]
+            future = asyncio.ensure_future(self._run(snapshot, clauses))
+            self._consistency[component] = future
+        return future
+
+    async def _run(self, snapshot, clauses):
+        """is_unsatisfiable in the process pool, with a budget of its own"""
+        budget = snapshot.budget.start() if snapshot.budget is not None else None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, is_unsatisfiable, snapshot.engine, clauses, budget)
+
+    def close(self):
+        self.mutator.shutdown()
+        self.executor.shutdown()
+
+
+async def _serve(belief_server, path):
+    server = await asyncio.start_unix_server(belief_server.handle, path=path)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with server:
+        await stop.wait()
+
+
+def serve(belief_base, path, workers=None):
+    """Serves the belief base on a Unix socket at path until SIGINT or SIGTERM"""
+    # a socket file left by a previous server would make the bind fail
+    if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+        os.unlink(path)
+    belief_server = BeliefServer(belief_base, workers)
+    try:
+        asyncio.run(_serve(belief_server, path))
+    finally:
+        belief_server.close()
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+class BeliefClient:
+    """
+    Blocking client for the server, one request at a time:
+        with BeliefClient(path) as client:
+            client.request('add', formula='p', priority='high')
+            client.request('entails', formula='p | q')['entails']
+    """
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+        self.file = self.socket.makefile('rw', encoding='utf-8')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, op, **arguments):
+        """Sends a command and returns the reply as a dict"""
+        self.file.write(json.dumps(dict(arguments, op=op)) + '\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
@@ -0,0 +1,137 @@
+"""
+Binary snapshots of a compiled belief base, written by BeliefBase.save and read by
+BeliefBase.load without parsing a single formula (and without importing sympy).
+
+Layout, little endian, every section a packed array:
+    header      MAGIC, then the 7 counts of HEADER
+    priorities  float64[beliefs]        priority level of each belief
+    name_len    uint32[symbols]         utf-8 length of each symbol name, 0 for nameless variables
+    text_len    uint32[beliefs]         utf-8 length of each formula
+    clause_len  uint32[clauses]         number of literals of each clause
+    literals    int32[literals]         literals of all clauses, on the snapshot's own variables 1..n
+    prov_len    uint32[beliefs]         number of clauses of each belief
+    provenance  uint32[links]           clause indices of all beliefs
+    text        utf-8 symbol names followed by the formulas
+The file is memory-mapped when loading, the arrays are read in place through memoryview casts.
+Variables are numbered densely in the file and mapped to the symbol table of the process
+on load, so snapshots can be shared between processes.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+from clauses import symbols
+
+MAGIC = b'BRBASE02'
+HEADER = struct.Struct('<7Q')  # symbols, beliefs, clauses, literals, links, text bytes, reserved
+# the arrays are stored little endian, in place on most machines
+SWAP = sys.byteorder == 'big'
+
+
+def save_snapshot(belief_base, path):
+    """Writes the beliefs, priorities, clauses and provenance of a belief base to path"""
+    store, clause_db = belief_base.store, belief_base.clause_db
+    beliefs = sorted(store.members, key=store.ids.get)
+
+    clause_index = {}
+    variables = {}  # process variable -> snapshot variable
+    clause_len, literals = array('I'), array('i')
+    prov_len, provenance = array('I'), array('I')
+    for belief in beliefs:
+        clauses = clause_db.by_belief[belief]
+        prov_len.append(len(clauses))
+        for clause in clauses:
+            index = clause_index.get(clause)
+            if index is None:
+                index = clause_index[clause] = len(clause_index)
+                clause_len.append(len(clause))
+                for lit in sorted(clause, key=abs):
+                    var = variables.setdefault(abs(lit), len(variables) + 1)
+                    literals.append(var if lit > 0 else -var)
+            provenance.append(index)
+
+    names = [(symbols.name(var) or '').encode('utf-8') for var in variables]
+    texts = [str(belief).encode('utf-8') for belief in beliefs]
+    priorities = array('d', (store.level(belief) for belief in beliefs))
+    name_len = array('I', map(len, names))
+    text_len = array('I', map(len, texts))
+    text = b''.join(names) + b''.join(texts)
+
+    if SWAP:
+        for section in (priorities, name_len, text_len, clause_len, literals, prov_len, provenance):
+            section.byteswap()
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(names), len(beliefs), len(clause_len), len(literals),
+                            len(provenance), len(text), 0))
+        for section in (priorities, name_len, text_len, clause_len, literals, prov_len, provenance):
+            section.tofile(f)
+        f.write(text)
+    # replace the old snapshot only once the new one is complete
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(belief_base, path):
+    """Adds the beliefs of a snapshot to a belief base; returns the number of beliefs read"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a belief base snapshot")
+        view = memoryview(data)
+        try:
+            return _read_snapshot(belief_base, view)
+        finally:
+            view.release()
+
+
+def _read_snapshot(belief_base, view):
+    offset = len(MAGIC)
+    n_symbols, n_beliefs, n_clauses, n_literals, n_links, n_text, _ = HEADER.unpack_from(view, offset)
+    offset += HEADER.size
+
+    sections = []
+    for fmt, count in (('d', n_beliefs), ('I', n_symbols), ('I', n_beliefs), ('I', n_clauses),
+                       ('i', n_literals), ('I', n_beliefs), ('I', n_links)):
+        size = struct.calcsize(fmt) * count
+        section = view[offset:offset + size].cast(fmt)
+        if SWAP:
+            section = array(fmt, section)
+            section.byteswap()
+        sections.append(section)
+        offset += size
+    priorities, name_len, text_len, clause_len, literals, prov_len, provenance = sections
+    text = view[offset:offset + n_text]
+
+    try:
+        # snapshot variable -> process variable, nameless ones get fresh variables
+        mapping = [0]
+        position = 0
+        for length in name_len:
+            name = str(text[position:position + length], 'utf-8')
+            mapping.append(symbols.id(name) if length else symbols.fresh())
+            position += length
+
+        clauses = []
+        start = 0
+        for length in clause_len:
+            clauses.append(frozenset(
+                mapping[lit] if lit > 0 else -mapping[-lit] for lit in literals[start:start + length]))
+            start += length
+
+        start = 0
+        for index in range(n_beliefs):
+            formula = str(text[position:position + text_len[index]], 'utf-8')
+            position += text_len[index]
+            belief_clauses = tuple(clauses[i] for i in provenance[start:start + prov_len[index]])
+            start += prov_len[index]
+            # integer levels come back as int, e.g. 3 and not 3.0
+            level = priorities[index]
+            belief_base._add_compiled(formula, int(level) if level.is_integer() else level, belief_clauses)
+    finally:
+        for section in sections:
+            if isinstance(section, memoryview):
+                section.release()
+        text.release()
+    return n_beliefs
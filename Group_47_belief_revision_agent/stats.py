@@ -0,0 +1,66 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class ProverStats:
+    """
+    Statistics of a belief base, collected only after BeliefBase.enable_stats().
+
+    counters: totals over all calls, e.g. entailment checks, the engine counters
+        (resolution rounds, pairs tried, resolvents, duplicates rejected, or the CDCL
+        conflicts and decisions), subsets examined while computing remainder sets, and
+        'unknown' checks that ran out of budget (see budget.py). Those report the counters
+        they got to, with entailed=None and the exhausted resource.
+    timings: seconds spent per phase: 'cnf' (clausifying beliefs and queries),
+        'saturation' (the entailment engine), 'remainders' and 'selection', and in
+        compiled mode 'compilation' (building the BDD) and 'bdd' (answering from it).
+    last_contraction: subsets examined, remainder size and selection scores of the
+        last contraction.
+
+    Every call reports an event to the callbacks as callback(event, data), with event
+    'entailment' or 'contraction', so they can be forwarded to other metrics systems.
+    """
+    def __init__(self, callback=None):
+        self.counters = Counter()
+        self.timings = Counter()
+        self.last_contraction = {}
+        self.callbacks = [callback] if callback else []
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def phase(self, name):
+        """Adds the time spent in the with block to the timing of the phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - start
+
+    def record(self, event, counters, **data):
+        """Adds the counters of one call to the totals and reports the event with extra data"""
+        self.counters[event] += 1
+        self.counters.update(counters)
+        for callback in self.callbacks:
+            callback(event, dict(counters, **data))
+
+    def record_contraction(self, **data):
+        """Reports a contraction; its subsets_examined counter is already in the totals"""
+        self.last_contraction = data
+        self.counters['contraction'] += 1
+        for callback in self.callbacks:
+            callback('contraction', dict(data))
+
+    def as_dict(self):
+        return {
+            'counters': dict(self.counters),
+            'timings': dict(self.timings),
+            'last_contraction': self.last_contraction,
+        }
+
+    def reset(self):
+        self.counters.clear()
+        self.timings.clear()
+        self.last_contraction = {}
@@ -0,0 +1,133 @@
+import re
+
+# numeric levels of the named priorities, any other number is a level too (e.g. 2.5)
+LOW, MID, HIGH = 1, 2, 3
+PRIORITY_LEVELS = {'low': LOW, 'mid': MID, 'high': HIGH}
+# a numeric level given as text, with one optional sign
+NUMBER = re.compile(r'[+-]?(\d+(\.\d*)?|\.\d+)')
+
+
+def priority_level(priority):
+    """Level of a priority name ('low', 'mid', 'high') or number, unchanged; unknown names are low"""
+    if isinstance(priority, (int, float)) and not isinstance(priority, bool):
+        return priority
+    if isinstance(priority, str) and NUMBER.fullmatch(priority):
+        return float(priority) if '.' in priority else int(priority)
+    return PRIORITY_LEVELS.get(priority, LOW)
+
+
+class BeliefStore:
+    """
+    Compact storage of the beliefs of a base.
+    Every member gets an id when it is added, in insertion order, and its priority level is
+    kept by formula; the current members are a set of formulas, so adding or removing a
+    belief is O(1). A removed belief gives up its id and level, a later id is never reused.
+    The read-only views (all members, low/mid/high) are built on demand and cached until
+    the next change.
+    """
+    def __init__(self):
+        self.ids = {}                 # member formula -> id
+        self.levels = {}              # member formula -> priority level, int or float
+        self.members = set()          # formulas currently in the base
+        self._next_id = 0
+        self._frozen = None           # cached frozenset of the members
+        self._bands = None            # cached (low, mid, high) views
+
+    def __len__(self):
+        return len(self.members)
+
+    def __contains__(self, formula):
+        return formula in self.members
+
+    def add(self, formula, level, belief_id=None):
+        """
+        Adds a belief, or changes its priority level if it is already a member.
+        belief_id: the id of a removed belief that is put back (see BeliefBase.restore).
+        """
+        if formula not in self.ids:
+            if belief_id is None:
+                belief_id = self._next_id
+                self._next_id += 1
+            self.ids[formula] = belief_id
+        self.levels[formula] = level
+        self.members.add(formula)
+        self._changed()
+
+    def discard(self, formula):
+        self.members.discard(formula)
+        self.ids.pop(formula, None)
+        self.levels.pop(formula, None)
+        self._changed()
+
+    def retain(self, formulas):
+        """Removes every member that is not in formulas"""
+        for formula in self.members.difference(formulas):
+            del self.ids[formula]
+            del self.levels[formula]
+        self.members.intersection_update(formulas)
+        self._changed()
+
+    def clear(self):
+        self.ids.clear()
+        self.levels.clear()
+        self.members.clear()
+        self._changed()
+
+    def _changed(self):
+        self._frozen = None
+        self._bands = None
+
+    def copy(self):
+        """Independent store with the same beliefs"""
+        other = BeliefStore()
+        other.ids = dict(self.ids)
+        other.levels = dict(self.levels)
+        other.members = set(self.members)
+        other._next_id = self._next_id
+        return other
+
+    def level(self, formula):
+        return self.levels.get(formula, LOW)
+
+    def frozen(self):
+        """The members as a frozenset, a view that later changes of the store do not affect"""
+        if self._frozen is None:
+            self._frozen = frozenset(self.members)
+        return self._frozen
+
+    def bands(self):
+        """
+        Members split in the three named priorities by their raw levels: low (level < MID),
+        mid (MID <= level < HIGH) and high (level >= HIGH).
+        """
+        if self._bands is None:
+            low, mid, high = set(), set(), set()
+            for formula in self.members:
+                level = self.levels[formula]
+                if level >= HIGH:
+                    high.add(formula)
+                elif level >= MID:
+                    mid.add(formula)
+                else:
+                    low.add(formula)
+            self._bands = (frozenset(low), frozenset(mid), frozenset(high))
+        return self._bands
+
+
+class Version:
+    """
+    A point in the change journal of a belief base, returned by BeliefBase.snapshot().
+    It stays valid while the journal still holds the same change at its position, i.e.
+    until the base is restored to an earlier version and changed again, or until it is
+    released. The base only keeps weak references to its versions, so a version that is
+    no longer referenced is released too.
+    """
+    __slots__ = ('owner', 'position', 'last', '__weakref__')
+
+    def __init__(self, owner, position, last):
+        self.owner = owner
+        self.position = position
+        self.last = last  # the journal entry just before the version, None at the start
+
+    def __repr__(self):
+        return f"Version({self.position})"
@@ -0,0 +1,58 @@
+"""
+Tests of the compiled belief base (bdd.py), run with: python -m pytest
+"""
+import random
+
+import pytest
+
+from bdd import CompiledBase
+from budget import Budget, BudgetExceeded
+from cdcl import Solver
+
+
+def random_clauses(rng, num_vars, num_clauses):
+    return [frozenset(rng.choice((-1, 1)) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3)))
+            for _ in range(num_clauses)]
+
+
+def test_entailment_matches_the_solver():
+    for seed in range(300):
+        rng = random.Random(seed)
+        clauses = random_clauses(rng, 8, rng.randint(0, 20))
+        compiled = CompiledBase(clauses)
+        assert compiled.is_consistent() == Solver(clauses).solve()
+        for query in random_clauses(rng, 10, 5):
+            refuted = not Solver(clauses + [frozenset([-lit]) for lit in query]).solve()
+            assert compiled.entails_clause(query) == refuted, (clauses, query)
+
+
+def test_added_clauses_are_conjoined_on_the_next_query():
+    compiled = CompiledBase([frozenset([1, 2])])
+    assert not compiled.entails_clause(frozenset([2]))
+    compiled.add([frozenset([-1])])
+    assert compiled.pending
+    assert compiled.entails_clause(frozenset([2]))
+    assert not compiled.pending
+
+
+def test_copy_shares_the_nodes():
+    compiled = CompiledBase([frozenset([1, 2]), frozenset([-2, 3])])
+    compiled.build()
+    copy = compiled.copy()
+    copy.add([frozenset([-1])])
+    assert copy.bdd is compiled.bdd
+    assert copy.entails_clause(frozenset([3]))
+    assert not compiled.entails_clause(frozenset([3]))
+    assert compiled.entails_clause(frozenset([1, 3]))
+
+
+def test_build_resumes_after_the_budget_runs_out():
+    rng = random.Random(1)
+    clauses = [frozenset(rng.choice((-1, 1)) * rng.randint(1, 24) for _ in range(3)) for _ in range(80)]
+    compiled = CompiledBase(clauses)
+    # max_clauses bounds the number of nodes
+    with pytest.raises(BudgetExceeded):
+        compiled.build(Budget(max_clauses=300).start())
+    assert 0 < len(compiled.pending) < len(clauses)
+    assert compiled.is_consistent() == Solver(clauses).solve()
+    assert not compiled.pending
@@ -0,0 +1,151 @@
+"""
+Regression tests of BeliefBase, run with: python -m pytest
+"""
+import time
+
+import pytest
+
+from beliefbase import BeliefBase
+from benchmark import random_kcnf, pick_query
+from commands import execute
+
+
+@pytest.mark.parametrize('engine', ['resolution', 'cdcl'])
+def test_entails_many_matches_resolution(engine):
+    # entails_many used to saturate the whole 50-belief base before the first query
+    beliefs = random_kcnf(50, 0)
+    queries = [pick_query('resolution', beliefs, seed) for seed in range(30)]
+    base = BeliefBase(engine=engine)
+    for formula, priority in beliefs:
+        base.add_with_priority(formula, priority)
+    start = time.monotonic()
+    batched = base.entails_many(queries)
+    assert time.monotonic() - start < 5
+    assert batched == [base.resolution(base.belief_base, query) for query in queries]
+
+
+def test_fractional_priority_is_kept():
+    base = BeliefBase()
+    base.add_with_priority('p', 2.5)
+    base.add_with_priority('p >> q', 2)
+    assert base.store.level('p') == 2.5
+    # the incision cuts the lower level, 2 < 2.5
+    base.contraction('q', mode='kernel')
+    assert base.belief_base == {'p'}
+
+
+def test_belief_base_is_a_snapshot():
+    base = BeliefBase([('p', 'high'), ('q', 'low')])
+    beliefs = base.belief_base
+    base.contraction('q')
+    assert beliefs == {'p', 'q'}
+    assert base.belief_base == {'p'}
+    with pytest.raises(AttributeError):
+        base.belief_base.add('r')
+
+
+def test_journal_is_trimmed_when_versions_are_released():
+    base = BeliefBase([('p', 'high')])
+    first = base.snapshot()
+    base.add_with_priority('q')
+    second = base.snapshot()
+    base.add_with_priority('r')
+    base.release(first)
+    assert len(base._journal) == 1
+    with pytest.raises(ValueError):
+        base.restore(first)
+    base.restore(second)
+    assert base.belief_base == {'p', 'q'}
+    del second
+    base.add_with_priority('s')
+    # no live version left, the changes are not journaled anymore
+    assert base._journal is None
+
+
+def test_cdcl_batches_stay_flat():
+    # every query used to allocate a selector variable for good
+    from clauses import symbols
+    beliefs = random_kcnf(50, 0)
+    queries = [pick_query('resolution', beliefs, seed) for seed in range(200)]
+    base = BeliefBase(beliefs, engine='cdcl', cache_size=0)
+    base.entails_many(queries)
+    size = len(symbols)
+    start = time.monotonic()
+    base.entails_many(queries)
+    first = time.monotonic() - start
+    for _ in range(4):
+        base.entails_many(queries)
+    start = time.monotonic()
+    base.entails_many(queries)
+    assert len(symbols) == size
+    assert time.monotonic() - start < 3 * first + 0.05
+
+
+def test_entrenchment_revisions_stay_flat():
+    # every revision used to allocate one selector variable per belief for good
+    from clauses import symbols
+    base = BeliefBase([(f'p{i} | q{i}', 'mid') for i in range(30)] + [('r', 'low')])
+    base.revision('~r', mode='entrenchment')
+    base.revision('r', mode='entrenchment')
+    size = len(symbols)
+    for i in range(32):
+        base.revision('~r' if i % 2 == 0 else 'r', mode='entrenchment')
+    assert len(symbols) == size
+    assert 'r' in base.belief_base
+
+
+def test_compiled_mode_respects_the_deadline():
+    # the BDD of this base is far too large to build in half a second
+    from budget import Budget
+    beliefs = random_kcnf(80, 0)
+    base = BeliefBase(beliefs, compiled=True, budget=Budget(deadline=0.5))
+    query = pick_query('resolution', beliefs, 0)
+    start = time.monotonic()
+    assert base.resolution(base.belief_base, query) is None
+    assert base.entails_many([query]) == [None]
+    assert time.monotonic() - start < 2
+
+
+def test_compiled_mode_records_unknown_answers():
+    from budget import Budget
+    beliefs = random_kcnf(80, 0)
+    base = BeliefBase(beliefs, compiled=True, budget=Budget(max_memory=10**6))
+    stats = base.enable_stats()
+    assert base.resolution(base.belief_base, pick_query('resolution', beliefs, 0)) is None
+    assert stats.counters['unknown'] == 1
+
+
+def test_priority_level_parses_one_sign_only():
+    from store import priority_level, LOW
+    assert priority_level('-2') == -2
+    assert priority_level('+2.5') == 2.5
+    assert priority_level('--2') == LOW
+    assert priority_level('2.5.1') == LOW
+
+
+def test_removed_beliefs_release_their_ids():
+    base = BeliefBase()
+    for i in range(50):
+        base.add_with_priority(f'p{i}')
+        base.contraction(f'p{i}')
+    assert len(base.store.ids) == len(base.store.levels) == 0
+    version = base.snapshot()
+    base.add_with_priority('q')
+    base.add_with_priority('r')
+    base.contraction('q')
+    base.restore(version)
+    base.add_with_priority('r')
+    assert sorted(base.store.ids) == ['r']
+
+
+@pytest.mark.parametrize('encoding', ['cnf', 'tseitin'])
+def test_deep_nesting_is_an_error_reply(encoding):
+    # the recursive parser and encoders used to raise RecursionError past the command handler
+    base = BeliefBase(encoding=encoding)
+    nested = '(' * 1000 + 'p' + ')' * 1000
+    chain = ' >> '.join(f'p{i}' for i in range(2000))
+    for formula in (nested, chain):
+        for op in ('add', 'entails', 'revise'):
+            assert execute(base, {'op': op, 'formula': formula}) == {'ok': False, 'error': 'formula nested too deeply'}
+    assert execute(base, {'op': 'add', 'formula': 'p'}) == {'ok': True}
+    assert list(base.belief_base) == ['p']
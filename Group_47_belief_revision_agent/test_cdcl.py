@@ -0,0 +1,64 @@
+"""
+Tests of the CDCL solver (cdcl.py), run with: python -m pytest
+"""
+import random
+import time
+from itertools import product
+
+from cdcl import Solver
+from clauses import symbols
+
+
+def brute_force(clauses, num_vars):
+    """Whether the clauses have a model, by trying every assignment"""
+    for values in product((False, True), repeat=num_vars):
+        if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses):
+            return True
+    return False
+
+
+def random_cnf(rng, num_vars, num_clauses):
+    return [[rng.choice((-1, 1)) * rng.randint(1, num_vars) for _ in range(rng.randint(1, 3))]
+            for _ in range(num_clauses)]
+
+
+def test_matches_brute_force():
+    for seed in range(500):
+        rng = random.Random(seed)
+        clauses = random_cnf(rng, 6, rng.randint(1, 30))
+        solver = Solver(clauses)
+        assert solver.solve() == brute_force(clauses, 6), clauses
+
+
+def test_model_satisfies_the_clauses():
+    for seed in range(200):
+        rng = random.Random(seed)
+        clauses = random_cnf(rng, 8, 20)
+        solver = Solver(clauses)
+        if solver.solve():
+            model = solver.model()
+            assert all(any(lit in model for lit in clause) for clause in clauses)
+
+
+def test_assumptions_and_added_clauses():
+    for seed in range(300):
+        rng = random.Random(seed)
+        clauses = random_cnf(rng, 6, 12)
+        solver = Solver(clauses)
+        for _ in range(3):
+            assumption = rng.choice((-1, 1)) * rng.randint(1, 6)
+            assert solver.solve([assumption]) == brute_force(clauses + [[assumption]], 6)
+            extra = random_cnf(rng, 6, 1)
+            solver.add_clause(extra[0])
+            clauses += extra
+        assert solver.solve() == brute_force(clauses, 6)
+
+
+def test_cost_does_not_depend_on_the_symbol_table():
+    # variables far apart used to allocate (and decide) every variable in between
+    far = symbols.fresh() + 200_000
+    start = time.monotonic()
+    solver = Solver([[1, far], [-far, 2]])
+    assert solver.solve([-1, -2]) is False
+    assert solver.decisions < 10
+    assert time.monotonic() - start < 0.5
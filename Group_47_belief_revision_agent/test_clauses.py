@@ -0,0 +1,50 @@
+"""
+Tests of the clause database (clauses.py), run with: python -m pytest
+"""
+import random
+
+from clauses import ClauseDatabase, symbols, variables
+
+
+def rebuilt_components(clause_db):
+    """The components computed from scratch"""
+    components, assigned = set(), set()
+    for belief, clauses in clause_db.by_belief.items():
+        if belief not in assigned:
+            component = frozenset(clause_db.connected(variables(clauses)) | {belief})
+            assigned |= component
+            components.add(component)
+    return components
+
+
+def test_components_follow_adds_and_retracts():
+    for seed in range(100):
+        rng = random.Random(seed)
+        databases = [ClauseDatabase()]
+        for _ in range(60):
+            clause_db = rng.choice(databases)
+            if rng.random() < 0.1:
+                databases.append(clause_db.copy())
+            elif clause_db.by_belief and rng.random() < 0.4:
+                clause_db.retract(rng.choice(list(clause_db.by_belief)))
+            else:
+                clause_db.add(' | '.join(f"{rng.choice(['', '~'])}v{rng.randint(0, 12)}"
+                                         for _ in range(rng.randint(1, 2))))
+            for other in databases:
+                assert set(other.components()) == rebuilt_components(other)
+
+
+def test_copy_shares_the_unchanged_sets():
+    clause_db = ClauseDatabase()
+    for i in range(100):
+        clause_db.add(f'x{i} | x{i + 1}')
+    copy = clause_db.copy()
+    copy.add('y | x0')
+    copy.retract('x50 | x51')
+    untouched = next(iter(clause_db.by_belief['x10 | x11']))
+    assert copy.sources[untouched] is clause_db.sources[untouched]
+    assert 'y | x0' in copy.by_variable[symbols.id('x0')]
+    assert 'y | x0' not in clause_db.by_variable[symbols.id('x0')]
+    assert 'x50 | x51' in clause_db
+    assert set(clause_db.components()) == rebuilt_components(clause_db)
+    assert len(copy.components()) == 2
@@ -0,0 +1,112 @@
+"""
+Tests of the native parser and the CNF encodings (formulas.py), run with: python -m pytest
+"""
+import random
+from itertools import product
+
+import pytest
+
+from cdcl import Solver
+from clauses import symbols
+from formulas import parse, compile_text
+
+NAMES = ('a', 'b', 'c', 'd')
+
+
+def var(name):
+    return ('var', symbols.id(name))
+
+
+def evaluate(node, values):
+    """Truth value of a parse tree under values (variable -> bool)"""
+    kind = node[0]
+    if kind == 'var':
+        return values[node[1]]
+    if kind == 'const':
+        return node[1]
+    if kind == 'not':
+        return not evaluate(node[1], values)
+    if kind == 'implies':
+        return not evaluate(node[1], values) or evaluate(node[2], values)
+    if kind == 'xor':
+        return evaluate(node[1], values) != evaluate(node[2], values)
+    results = [evaluate(operand, values) for operand in node[1]]
+    return all(results) if kind == 'and' else any(results)
+
+
+def assignments():
+    ids = [symbols.id(name) for name in NAMES]
+    for values in product((False, True), repeat=len(ids)):
+        yield dict(zip(ids, values))
+
+
+def satisfies(clauses, values):
+    return all(any(values[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def random_formula(rng, depth=3, leaves=NAMES + ('True', 'False')):
+    if depth == 0 or rng.random() < 0.25:
+        return rng.choice(leaves)
+    choice = rng.randrange(4)
+    if choice == 0:
+        return '~' + random_formula(rng, depth - 1, leaves)
+    if choice == 1:
+        return f'({random_formula(rng, depth - 1, leaves)})'
+    operator = rng.choice(('&', '|', '^', '>>', '<<'))
+    return f'{random_formula(rng, depth - 1, leaves)} {operator} {random_formula(rng, depth - 1, leaves)}'
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('a | b & c', lambda a, b, c: ('or', [a, ('and', [b, c])])),
+    ('a ^ b & c', lambda a, b, c: ('xor', a, ('and', [b, c]))),
+    ('a | b ^ c', lambda a, b, c: ('or', [a, ('xor', b, c)])),
+    ('a ^ b ^ c', lambda a, b, c: ('xor', ('xor', a, b), c)),
+    ('a & b >> c', lambda a, b, c: ('and', [a, ('implies', b, c)])),
+    ('a >> b >> c', lambda a, b, c: ('implies', ('implies', a, b), c)),
+    ('a << b', lambda a, b, c: ('implies', b, a)),
+    ('~a & b', lambda a, b, c: ('and', [('not', a), b])),
+    ('~~a', lambda a, b, c: a),
+    ('~(a | b)', lambda a, b, c: ('not', ('or', [a, b]))),
+    ('True | False', lambda a, b, c: ('or', [('const', True), ('const', False)])),
+])
+def test_precedence(text, expected):
+    assert parse(text, symbols) == expected(var('a'), var('b'), var('c'))
+
+
+def test_precedence_matches_sympify():
+    sympy = pytest.importorskip('sympy')
+    for seed in range(200):
+        # Python evaluates the operators of constants before sympy sees them
+        text = random_formula(random.Random(seed), leaves=NAMES)
+        expr = sympy.sympify(text, convert_xor=False)
+        node = parse(text, symbols)
+        for values in assignments():
+            substitution = {sympy.Symbol(name): values[symbols.id(name)] for name in NAMES}
+            assert bool(expr.subs(substitution)) == evaluate(node, values), text
+
+
+@pytest.mark.parametrize('text', ['', 'a &', '(a', 'a b', 'a $ b', '& a', 'a )'])
+def test_invalid_formulas(text):
+    with pytest.raises(ValueError):
+        parse(text, symbols)
+
+
+def test_cnf_is_equivalent():
+    for seed in range(300):
+        text = random_formula(random.Random(seed))
+        node = parse(text, symbols)
+        clauses, negated = compile_text(text, symbols), compile_text(text, symbols, negate=True)
+        for values in assignments():
+            assert satisfies(clauses, values) == evaluate(node, values), text
+            assert satisfies(negated, values) != evaluate(node, values), text
+
+
+def test_tseitin_decides_entailment_as_cnf():
+    for seed in range(300):
+        rng = random.Random(seed)
+        base, query = random_formula(rng), random_formula(rng)
+        answers = []
+        for encoding in ('cnf', 'tseitin'):
+            clauses = compile_text(base, symbols, encoding=encoding) + compile_text(query, symbols, True, encoding)
+            answers.append(Solver(clauses).solve())
+        assert answers[0] == answers[1], (base, query)
@@ -0,0 +1,59 @@
+"""
+Tests of the clause set simplification (preprocess.py), run with: python -m pytest
+"""
+import random
+from itertools import product
+
+from cdcl import Solver
+from preprocess import preprocess, simplify
+
+NUM_VARS = 6
+
+
+def random_cnf(rng, num_clauses):
+    return [frozenset(rng.choice((-1, 1)) * rng.randint(1, NUM_VARS) for _ in range(rng.randint(1, 3)))
+            for _ in range(num_clauses)]
+
+
+def models(clauses):
+    """The assignments of variables 1..NUM_VARS that satisfy the clauses"""
+    return {values for values in product((False, True), repeat=NUM_VARS)
+            if all(any(values[abs(lit) - 1] == (lit > 0) for lit in clause) for clause in clauses)}
+
+
+def test_preprocess_keeps_satisfiability():
+    for seed in range(500):
+        rng = random.Random(seed)
+        clauses = random_cnf(rng, rng.randint(1, 25))
+        satisfiable = Solver(clauses).solve()
+        decision, remaining = preprocess(clauses)
+        if decision is None:
+            assert remaining
+            assert Solver(remaining).solve() == satisfiable, clauses
+        else:
+            assert decision == (not satisfiable), clauses
+
+
+def test_preprocess_counts():
+    stats = {}
+    # 1 is a unit, 3 is pure, [2, 4] subsumes [2, 4, 5]
+    decision, _ = preprocess([[1], [-1, 2, 4], [2, 4, 5], [3, -2]], stats)
+    assert decision is False
+    assert stats['preprocess_units'] >= 1
+    assert stats['preprocess_clauses_in'] == 4
+    assert stats['preprocess_decided'] == 1
+
+
+def test_simplify_keeps_the_models():
+    for seed in range(500):
+        rng = random.Random(seed)
+        clauses = random_cnf(rng, rng.randint(1, 20))
+        simplified = simplify(clauses)
+        assert models(simplified) == models(clauses), clauses
+        # the base of a session may grow: adding clauses to either gives the same models
+        extra = random_cnf(rng, 3)
+        assert models(simplified + extra) == models(clauses + extra), clauses
+
+
+def test_simplify_unsatisfiable():
+    assert simplify([[1], [-1, 2], [-2]]) == [frozenset()]
@@ -0,0 +1,86 @@
+"""
+Tests of the socket server (server.py) through BeliefClient, run with: python -m pytest
+"""
+import asyncio
+import os
+import tempfile
+import threading
+
+import pytest
+
+from beliefbase import BeliefBase
+from server import BeliefServer, BeliefClient
+
+
+@pytest.fixture(params=[False, True], ids=['clauses', 'compiled'])
+def server_path(request):
+    """Serves an empty belief base on a Unix socket in a background thread"""
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'beliefs.sock')
+    belief_server = BeliefServer(BeliefBase(compiled=request.param), workers=2)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    async def run():
+        server = await asyncio.start_unix_server(belief_server.handle, path=path)
+        started.set()
+        async with server:
+            await server.serve_forever()
+
+    async def shutdown():
+        # the server and the connections it still handles
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(run(), loop)
+    started.wait(5)
+    yield path
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+    belief_server.close()
+    os.unlink(path)
+    os.rmdir(directory)
+
+
+def test_mutations_and_reads(server_path):
+    with BeliefClient(server_path) as client:
+        assert client.request('add', formula='p', priority='high') == {'ok': True}
+        assert client.request('add', formula='p >> q', priority='low') == {'ok': True}
+        assert client.request('entails', formulas=['q', 'r'])['entails'] == [True, False]
+        assert client.request('contract', formula='q', mode='kernel', id=7) == {'ok': True, 'id': 7}
+        assert client.request('entails', formula='q')['entails'] is False
+        assert client.request('dump')['beliefs'] == [['p', 3]]
+        assert client.request('frobnicate')['ok'] is False
+
+
+def test_inconsistent_component_entails_everything(server_path):
+    with BeliefClient(server_path) as client:
+        client.request('add', formula='p')
+        client.request('add', formula='r & ~r')
+        # q only shares symbols with no belief, but the base is inconsistent
+        assert client.request('entails', formula='q')['entails'] is True
+
+
+def test_clients_see_each_others_mutations(server_path):
+    with BeliefClient(server_path) as writer, BeliefClient(server_path) as reader:
+        writer.request('add', formula='a | b')
+        writer.request('revise', formula='~a')
+        assert reader.request('entails', formulas=['b', '~a'])['entails'] == [True, True]
+
+
+def test_compiled_snapshot_is_built_before_publishing():
+    belief_server = BeliefServer(BeliefBase(compiled=True), workers=1)
+    try:
+        result, snapshot = belief_server._mutate({'op': 'add', 'formula': 'p >> q', 'priority': 1})
+        assert result['ok']
+        # the readers of the snapshot only traverse the BDD built by the mutation thread
+        assert snapshot._bdd is not None and not snapshot._bdd.pending
+        assert snapshot._compiled_entails('~p | q', None) is True
+    finally:
+        belief_server.close()
@@ -0,0 +1,66 @@
+"""
+Tests of the binary snapshots (snapshot.py) and the streaming loader (loader.py),
+run with: python -m pytest
+"""
+import io
+import os
+
+import pytest
+
+from beliefbase import BeliefBase
+from loader import read_beliefs, chunks
+from store import HIGH, LOW
+
+BELIEFS = [('p', 'high'), ('p >> q', 2.5), ('q ^ r', 7), ('~s | (t & u)', 'low')]
+QUERIES = ['q', 'r', '~r', 's >> t', 'u']
+
+
+@pytest.mark.parametrize('encoding', ['cnf', 'tseitin'])
+def test_snapshot_round_trip(tmp_path, encoding):
+    base = BeliefBase(BELIEFS, encoding=encoding)
+    path = os.path.join(tmp_path, 'beliefs.snapshot')
+    base.save(path)
+    loaded = BeliefBase.load(path, encoding=encoding)
+    assert loaded.belief_base == base.belief_base
+    assert [loaded.store.level(formula) for formula, _ in BELIEFS] == [HIGH, 2.5, 7, LOW]
+    # integral levels come back as ints
+    assert isinstance(loaded.store.level('q ^ r'), int)
+    assert loaded.entails_many(QUERIES) == base.entails_many(QUERIES)
+    loaded.contraction('q', mode='kernel')
+    assert loaded.belief_base == {'p', 'q ^ r', '~s | (t & u)'}
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = os.path.join(tmp_path, 'beliefs.txt')
+    with open(path, 'w') as f:
+        f.write('p high\n')
+    with pytest.raises(ValueError):
+        BeliefBase.load(path)
+
+
+def test_read_lines():
+    text = '# comment\n\np high\np >> q 2.5\nq | r -1\nr\n'
+    assert list(read_beliefs(io.StringIO(text))) == [('p', 'high'), ('p >> q', 2.5), ('q | r', -1), ('r', 'low')]
+
+
+def test_read_jsonl(tmp_path):
+    path = os.path.join(tmp_path, 'beliefs.jsonl')
+    with open(path, 'w') as f:
+        f.write('"p"\n["p >> q", 2.5]\n{"formula": "q | r", "priority": "mid"}\n{"formula": "s"}\n')
+    assert list(read_beliefs(path)) == [('p', 'low'), ('p >> q', 2.5), ('q | r', 'mid'), ('s', 'low')]
+
+
+def test_read_errors_name_the_line():
+    with pytest.raises(ValueError, match='line 2'):
+        list(read_beliefs(io.StringIO('"p"\n{"priority": 1}\n'), format='jsonl'))
+    with pytest.raises(ValueError, match='Unknown belief file format'):
+        list(read_beliefs(io.StringIO('p'), format='csv'))
+
+
+def test_load_beliefs_in_chunks():
+    assert list(chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    lines = ''.join(f'p{i} | p{i + 1} {i}\n' for i in range(25))
+    base = BeliefBase()
+    assert base.load_beliefs(io.StringIO(lines), chunk_size=4) == 25
+    assert len(base.belief_base) == 25
+    assert base.store.level('p24 | p25') == 24
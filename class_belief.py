@@ -1,30 +1,35 @@
 class BeliefBase:
     def __init__(self):
-        self.beliefs = []  # list of (formula, priority) tuples
+        self.beliefs = {}  # formula -> priority, in insertion order
+        self._ordered = None  # cached list of (formula, priority) sorted by priority
 
     def add(self, formula, priority=1):
         """Add a belief with a priority."""
-        if formula not in [f for f, _ in self.beliefs]:
-            self.beliefs.append((formula, priority))
-            self.beliefs.sort(key=lambda x: -x[1])  # sort by priority descending
+        if formula not in self.beliefs:
+            self.beliefs[formula] = priority
+            self._ordered = None
         else:
             print(f"Belief '{formula}' already exists.")
 
     def remove(self, formula):
         """Remove a belief."""
-        self.beliefs = [b for b in self.beliefs if b[0] != formula]
+        if self.beliefs.pop(formula, None) is not None:
+            self._ordered = None
 
     def list_beliefs(self):
         """Return the list of beliefs in order of priority."""
-        return self.beliefs
+        if self._ordered is None:
+            # sort by priority descending, insertion order among equal priorities
+            self._ordered = sorted(self.beliefs.items(), key=lambda x: -x[1])
+        return self._ordered
 
     def contains(self, formula):
         """Check if a belief is in the base."""
-        return any(b[0] == formula for b in self.beliefs)
+        return formula in self.beliefs
 
     def get_formulas(self):
         """Return just the formulas."""
-        return [f for f, _ in self.beliefs]
+        return [f for f, _ in self.list_beliefs()]
 
     def __str__(self):
-        return '\n'.join([f"{f} (priority {p})" for f, p in self.beliefs])
\ No newline at end of file
+        return '\n'.join([f"{f} (priority {p})" for f, p in self.list_beliefs()])